@@ -0,0 +1,61 @@
+"""
+Benchmark: host/guest name resolution in prepare_frames
+
+Compares the old per-row apply with data_processing.resolve_side_names.
+Run from the repository root (needs .streamlit/secrets.toml, like the app):
+
+    python benchmarks/bench_name_resolution.py [n_points]
+"""
+
+import sys
+import timeit
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from benchmarks.synthetic import HOST, make_matches, make_points  # noqa: E402
+from swingvision_analytics.data_processing import resolve_side_names  # noqa: E402
+
+
+def resolve_with_apply(points, col):
+    return points.apply(lambda r: HOST if r[col] == "host" else r["guest_team"], axis=1)
+
+
+def main(n_points: int = 200_000):
+    matches = make_matches(max(n_points // 150, 1))
+    points = make_points(matches, n_points).merge(
+        matches[["match_id", "guest_team"]], on="match_id", how="left"
+    )
+
+    for col in ("match_server", "point_winner"):
+        expected = resolve_with_apply(points, col)
+        actual = resolve_side_names(points[col], points["guest_team"])
+        assert expected.equals(actual), col
+
+    runs = 3
+    old = min(
+        timeit.repeat(
+            lambda: [
+                resolve_with_apply(points, c) for c in ("match_server", "point_winner")
+            ],
+            number=1,
+            repeat=runs,
+        )
+    )
+    new = min(
+        timeit.repeat(
+            lambda: [
+                resolve_side_names(points[c], points["guest_team"])
+                for c in ("match_server", "point_winner")
+            ],
+            number=1,
+            repeat=runs,
+        )
+    )
+    print(f"{n_points:,} points, best of {runs}")
+    print(f"  row-wise apply: {old * 1000:9.1f} ms")
+    print(f"  vectorized:     {new * 1000:9.1f} ms  ({old / new:.0f}x faster)")
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 200_000)
@@ -0,0 +1,122 @@
+"""
+Benchmark: game-score and clutch analytics in tactical_analysis
+
+Compares the old per-point iterrows loops with analyze_game_score_performance
+and analyze_clutch_performance. Run from the repository root (needs
+.streamlit/secrets.toml, like the app):
+
+    python benchmarks/bench_tactical_analysis.py [n_points]
+"""
+
+import sys
+import timeit
+from pathlib import Path
+
+import pandas as pd
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from benchmarks.synthetic import HOST, make_matches, make_points  # noqa: E402
+from swingvision_analytics.data_processing import resolve_side_names  # noqa: E402
+from swingvision_analytics.tactical_analysis import (  # noqa: E402
+    analyze_clutch_performance,
+    analyze_game_score_performance,
+)
+
+STATS = {"won_point": ["count", "sum", "mean"]}
+COLUMNS = ["Total_Points", "Points_Won", "Win_Rate"]
+
+
+def game_score_with_iterrows(points):
+    rows = []
+    for _, point in points.iterrows():
+        host_score, guest_score = point["host_game_score"], point["guest_game_score"]
+        if pd.isna(host_score) or pd.isna(guest_score):
+            continue
+        rows.append(
+            {
+                "game_score": f"{host_score}-{guest_score}",
+                "won_point": point["point_winner"] == HOST,
+                "is_deuce": str(host_score) == "40" and str(guest_score) == "40",
+                "is_break_point": point["break_point"],
+                "is_set_point": point["set_point"],
+            }
+        )
+    df = pd.DataFrame(rows)
+    by_score = df.groupby("game_score").agg(STATS).round(3)
+    by_score.columns = COLUMNS
+    critical = (
+        df.groupby(["is_deuce", "is_break_point", "is_set_point"]).agg(STATS).round(3)
+    )
+    critical.columns = COLUMNS
+    return by_score.sort_values("Total_Points", ascending=False), critical
+
+
+def clutch_with_iterrows(points):
+    rows = []
+    for _, point in points.iterrows():
+        host_score = str(point["host_game_score"])
+        guest_score = str(point["guest_game_score"])
+        situations = {
+            "break_point": point["break_point"],
+            "set_point": point["set_point"],
+            "deuce_or_ad": "AD" in host_score
+            or "AD" in guest_score
+            or (host_score == "40" and guest_score == "40"),
+            "tight_game": host_score in ["30", "40"] and guest_score in ["30", "40"],
+        }
+        for name, is_situation in situations.items():
+            if is_situation:
+                rows.append(
+                    {
+                        "situation": name,
+                        "won_point": point["point_winner"] == HOST,
+                        "is_serving": point["match_server"] == HOST,
+                    }
+                )
+    df = pd.DataFrame(rows)
+    by_serve = df.groupby(["situation", "is_serving"]).agg(STATS).round(3)
+    by_serve.columns = COLUMNS
+    overall = df.groupby("situation").agg(STATS).round(3)
+    overall.columns = COLUMNS
+    return overall, by_serve
+
+
+def main(n_points: int = 1_000_000):
+    matches = make_matches(max(n_points // 150, 1))
+    points = make_points(matches, n_points).merge(
+        matches[["match_id", "guest_team"]], on="match_id", how="left"
+    )
+    for col in ("match_server", "point_winner"):
+        points[col] = resolve_side_names(points[col], points["guest_team"])
+    for col in ("break_point", "set_point"):
+        points[col] = points[col] == "True"
+    for col in ("host_game_score", "guest_game_score", "match_server", "point_winner"):
+        points[col] = points[col].astype("category")
+    # Synthetic games are 8 points with random scores: all regular games
+    points["game_type"] = "regular"
+
+    cases = [
+        ("game score", game_score_with_iterrows, analyze_game_score_performance),
+        ("clutch", clutch_with_iterrows, analyze_clutch_performance),
+    ]
+    print(f"{n_points:,} points")
+    for name, with_iterrows, vectorized in cases:
+        vectorized = vectorized.__wrapped__
+        start = timeit.default_timer()
+        expected = with_iterrows(points)
+        old = timeit.default_timer() - start
+        for want, got in zip(expected, vectorized(None, points)):
+            pd.testing.assert_frame_equal(want, got, check_exact=True)
+
+        runs = 3
+        new = min(
+            timeit.repeat(lambda: vectorized(None, points), number=1, repeat=runs)
+        )
+        print(f"  {name}")
+        print(f"    iterrows (once): {old * 1000:9.1f} ms")
+        print(f"    vectorized:      {new * 1000:9.1f} ms  ({old / new:.0f}x faster)")
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000)
@@ -0,0 +1,67 @@
+"""
+Synthetic SwingVision frames for the benchmarks
+Shapes and labels follow the stored tables; values are random
+"""
+
+import uuid
+
+import numpy as np
+import pandas as pd
+
+HOST = "Joao Cassis"
+
+DETAILS = [
+    "Forehand Winner",
+    "Backhand Winner",
+    "Forehand Unforced Error",
+    "Backhand Unforced Error",
+    "Double Fault",
+    "Ace",
+    "Service Winner",
+    "",
+]
+
+
+def make_matches(n_matches: int, seed: int = 0) -> pd.DataFrame:
+    rng = np.random.default_rng(seed)
+    start = pd.Timestamp("2024-01-01") + pd.to_timedelta(np.arange(n_matches), unit="D")
+    return pd.DataFrame(
+        {
+            "match_id": [
+                str(uuid.UUID(int=int(i))) for i in rng.integers(0, 2**63, n_matches)
+            ],
+            "start_time": start,
+            "host_team": HOST,
+            "guest_team": [f"Opponent {i % 25}" for i in range(n_matches)],
+            "location": [f"Club {i % 4}" for i in range(n_matches)],
+            "match_date": start.date,
+            "sets_per_match": 3,
+            "match_status": None,
+        }
+    )
+
+
+def make_points(matches: pd.DataFrame, n_points: int, seed: int = 0) -> pd.DataFrame:
+    """`n_points` points spread evenly over `matches`, 8 points per game."""
+    rng = np.random.default_rng(seed)
+    per_match = -(-n_points // len(matches))
+    seq = np.arange(n_points) % per_match
+    match_ids = matches["match_id"].to_numpy()[np.arange(n_points) // per_match]
+    game_seq = seq // 8
+    return pd.DataFrame(
+        {
+            "match_id": match_ids,
+            "set": game_seq // 12 + 1,
+            "game": game_seq % 12 + 1,
+            "point": seq % 8 + 1,
+            "serve_state": np.where(rng.random(n_points) < 0.6, "first", "second"),
+            "match_server": np.where(game_seq % 2 == 0, "host", "guest"),
+            "point_winner": np.where(rng.random(n_points) < 0.52, "host", "guest"),
+            "host_game_score": rng.choice(["0", "15", "30", "40", "AD"], n_points),
+            "guest_game_score": rng.choice(["0", "15", "30", "40", "AD"], n_points),
+            "detail": rng.choice(DETAILS, n_points),
+            "break_point": np.where(rng.random(n_points) < 0.1, "True", "False"),
+            "set_point": "False",
+            "favorited": "False",
+        }
+    )
@@ -15,63 +15,95 @@ from swingvision_analytics import (
     match_details,
     upload_files,
     data_processing,
+    dataset,
+    prefetch as prefetch_views,
 )
 
+VIEWS = [
+    "🧭 Decision Coach",
+    "📊 Dashboard",
+    "📈 Performance Evolution",
+    "🎾 Shot Analysis",
+    "📊 Match Analysis",
+    "🧠 Tactical Analysis",
+    "📋 Raw Data",
+    "🔍 Match Details",
+]
+
+# Views whose analytics are cached and can be computed ahead of time
+WARMERS = {
+    "🧭 Decision Coach": decision_coach.warm_cache,
+    "🎾 Shot Analysis": shot_analysis.warm_cache,
+    "🧠 Tactical Analysis": tactical_analysis.warm_cache,
+}
+
+
+def render_view(view, version, matches, points, shots, sets, match_metrics_df):
+    """Draw one view of the dashboard"""
+    if view == "🧭 Decision Coach":
+        decision_coach.render_decision_coach_tab(version, matches, points, shots, sets)
+    elif view == "📊 Dashboard":
+        dashboard.render_dashboard_tab(matches, points, shots, match_metrics_df)
+    elif view == "📈 Performance Evolution":
+        performance_evolution.render_performance_evolution_tab(
+            matches, points, shots, match_metrics_df
+        )
+    elif view == "🎾 Shot Analysis":
+        shot_analysis.render_shot_analysis_tab(version, matches, points, shots)
+    elif view == "📊 Match Analysis":
+        match_analysis.render_match_analysis_tab(
+            matches, points, shots, match_metrics_df
+        )
+    elif view == "🧠 Tactical Analysis":
+        tactical_analysis.render_tactical_analysis_tab(version, matches, points, shots)
+    elif view == "📋 Raw Data":
+        raw_data.render_raw_data_tab(matches, points, shots, sets)
+    elif view == "🔍 Match Details":
+        match_details.render_match_details_tab(
+            matches, points, shots, match_metrics_df
+        )
+
 
 def main_page():
     """Main dashboard page"""
     st.title("🎾 SwingVision Analytics Dashboard")
 
-    matches, points, shots, sets = data_processing.get_stored_data()
+    version = data_processing.stored_version()
+    data = dataset.get_dataset(version)
 
-    if matches.empty:
+    if data.matches.empty:
         st.warning("No match data found. Please upload some SwingVision files first.")
         return
 
-    matches, points, shots, sets = data_processing.process_data(
-        matches, points, shots, sets
-    )
+    # Shared across sessions: views copy before changing anything in place
+    matches, points, shots, sets = data.frames()
+    match_metrics_df = data.match_metrics
+
+    if not st.sidebar.toggle(
+        "Lazy views",
+        value=True,
+        help="Only compute the view on screen instead of every tab on each rerun.",
+    ):
+        tabs = st.tabs(VIEWS)
+        for view, tab in zip(VIEWS, tabs):
+            with tab:
+                render_view(
+                    view, version, matches, points, shots, sets, match_metrics_df
+                )
+        return
 
-    match_metrics_df = data_processing.calculate_match_metrics(matches, points, shots)
-
-    tab1, tab2, tab3, tab4, tab5, tab6, tab7, tab8 = st.tabs(
-        [
-            "🧭 Decision Coach",
-            "📊 Dashboard",
-            "📈 Performance Evolution",
-            "🎾 Shot Analysis",
-            "📊 Match Analysis",
-            "🧠 Tactical Analysis",
-            "📋 Raw Data",
-            "🔍 Match Details",
-        ]
+    prefetch = st.sidebar.toggle(
+        "Prefetch other views",
+        value=False,
+        help="After drawing this view, compute the others in the background.",
     )
+    view = st.segmented_control("View", VIEWS, default=VIEWS[0], key="swingvision_view")
+    view = view or VIEWS[0]
+    render_view(view, version, matches, points, shots, sets, match_metrics_df)
 
-    with tab1:
-        decision_coach.render_decision_coach_tab(matches, points, shots, sets)
-
-    with tab2:
-        dashboard.render_dashboard_tab(matches, points, shots, match_metrics_df)
-
-    with tab3:
-        performance_evolution.render_performance_evolution_tab(
-            matches, points, shots, match_metrics_df
-        )
-
-    with tab4:
-        shot_analysis.render_shot_analysis_tab(matches, points, shots)
-
-    with tab5:
-        match_analysis.render_match_analysis_tab(matches, points, shots)
-
-    with tab6:
-        tactical_analysis.render_tactical_analysis_tab(matches, points, shots)
-
-    with tab7:
-        raw_data.render_raw_data_tab(matches, points, shots, sets)
-
-    with tab8:
-        match_details.render_match_details_tab(matches, points, shots, match_metrics_df)
+    if prefetch:
+        warmers = [warm for other, warm in WARMERS.items() if other != view]
+        prefetch_views.start_prefetch(warmers, version, matches, points, shots)
 
 
 def main():
@@ -13,6 +13,14 @@ from . import raw_data
 from . import match_details
 from . import upload_files
 from . import data_processing
+from . import snapshot
+from . import rallies
+from . import prefetch
+from . import dataset
+from . import court
+from . import heatmaps
+from . import patterns
+from . import metrics
 
 __all__ = [
     "dashboard",
@@ -25,4 +33,12 @@ __all__ = [
     "match_details",
     "upload_files",
     "data_processing",
+    "snapshot",
+    "rallies",
+    "prefetch",
+    "dataset",
+    "court",
+    "heatmaps",
+    "patterns",
+    "metrics",
 ]
@@ -0,0 +1,87 @@
+"""
+Court module for SwingVision analytics
+Court geometry for shot locations: perspective normalization and zone grids
+"""
+
+import numpy as np
+import pandas as pd
+
+COURT_LENGTH = 23.77  # meters
+
+# Zone grids: per axis, bin edges in meters and one more label than edges.
+# They bin normalized coordinates: hit_y_n runs from my baseline (0) to the
+# net, hit_x_n across the court with the Ad side negative (lefty's forehand).
+# A depth belongs to the band whose lower edge it has reached; a width on an
+# edge belongs to the band nearer the center line, so the 3 x 3 Center band
+# is [-2, 2]. A missing depth counts as the last band and a missing width as
+# the band holding 0.
+ZONE_GRIDS = {
+    "3 x 3": {
+        "depth_edges": [0.0, 6.4],
+        "depth_labels": ["Deep", "Mid", "Short"],
+        "width_edges": [-2.0, 2.0],
+        "width_labels": ["Ad", "Center", "Deuce"],
+    },
+    "5 x 5": {
+        "depth_edges": [0.0, 3.2, 6.4, 9.0],
+        "depth_labels": ["Deep", "Back", "Mid", "Front", "Net"],
+        "width_edges": [-3.0, -1.0, 1.0, 3.0],
+        "width_labels": ["Wide Ad", "Ad", "Center", "Deuce", "Wide Deuce"],
+    },
+}
+
+DEFAULT_ZONE_GRID = "3 x 3"
+
+
+# Coordinates as if every shot were hit from my half; stored with the shots
+NORMALIZED_COLUMNS = {
+    "hit_x": "hit_x_n",
+    "hit_y": "hit_y_n",
+    "bounce_x": "bounce_x_n",
+    "bounce_y": "bounce_y_n",
+}
+
+
+def normalized_coordinates(shots: pd.DataFrame) -> pd.DataFrame:
+    """
+    NORMALIZED_COLUMNS of `shots`: coordinates of shots hit from the far half
+    are mirrored, and balls that found the net bounce at it. Same index.
+    """
+    far_side = (shots["hit_y"] > COURT_LENGTH / 2).to_numpy()
+    flipped = {}
+    for col in ("hit_x", "bounce_x"):
+        flipped[col] = shots[col].mask(far_side, -shots[col])
+    for col in ("hit_y", "bounce_y"):
+        flipped[col] = shots[col].mask(far_side, COURT_LENGTH - shots[col])
+    flipped["bounce_y"] = flipped["bounce_y"].mask(
+        shots["result"] == "Net", COURT_LENGTH / 2
+    )
+    return pd.DataFrame(
+        {NORMALIZED_COLUMNS[col]: values for col, values in flipped.items()},
+        index=shots.index,
+    )
+
+
+def _bin(values, edges, right=False) -> np.ndarray:
+    return np.digitize(np.asarray(values, dtype=float), edges, right=right)
+
+
+def zone_labels(hit_x, hit_y, grid: str = DEFAULT_ZONE_GRID) -> np.ndarray:
+    """'<depth> <width>' zone of every (hit_x, hit_y) pair on `grid`."""
+    spec = ZONE_GRIDS[grid]
+    names = np.array(
+        [
+            [f"{depth} {width}" for width in spec["width_labels"]]
+            for depth in spec["depth_labels"]
+        ],
+        dtype=object,
+    )
+    depth = _bin(hit_y, spec["depth_edges"])
+    hit_x = np.asarray(hit_x, dtype=float)
+    hit_x = np.where(np.isnan(hit_x), 0.0, hit_x)
+    width = np.where(
+        hit_x < 0,
+        _bin(hit_x, spec["width_edges"]),
+        _bin(hit_x, spec["width_edges"], right=True),
+    )
+    return names[depth, width]
@@ -3,13 +3,31 @@ Data Processing module for SwingVision analytics
 Contains functions for data retrieval and processing
 """
 
+import threading
+
+import numpy as np
 import streamlit as st
 import pandas as pd
 from db import engine
 from sqlalchemy import text
 
+from . import snapshot
+from .court import NORMALIZED_COLUMNS, normalized_coordinates
+from .rallies import RALLY_COLUMNS, build_rally_table
+from .metrics import (
+    MATCH_METRIC_COLUMNS,
+    MATCH_METRICS,
+    MATCH_METRICS_VERSION,
+    METRIC_DTYPES,
+    compute_metrics,
+    derive_metrics,
+)
+from .schema import POINT_DTYPES, SHOT_DTYPES
+
 HOST = "Joao Cassis"
 
+POINT_KEYS = ["match_id", "set", "game", "point"]
+
 STATUS_COMPLETED = "completed"
 STATUS_UNFINISHED = "unfinished"
 STATUS_TIME = "time"
@@ -48,18 +66,171 @@ def _table_exists(table_name: str) -> bool:
         return bool(result.scalar())
 
 
-@st.cache_data
-def get_stored_data():
-    matches = pd.read_sql(
-        "SELECT * FROM swingvision_matches", engine, parse_dates=["start_time"]
-    )
-    points = pd.read_sql("SELECT * FROM swingvision_points", engine)
-    shots = pd.read_sql("SELECT * FROM swingvision_shots", engine)
-    if _table_exists("swingvision_sets"):
-        sets = pd.read_sql("SELECT * FROM swingvision_sets", engine)
+class _TableCache:
+    """
+    Frames already read from Postgres, kept across st.cache_data clears.
+    `loaded_ids` is the per-table watermark: the match_ids whose rows are
+    already in `frames`. `dirty` marks frames not yet written to the snapshot.
+    """
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.frames = {}
+        self.loaded_ids = {}
+        self.match_ids = set()
+        self.dirty = False
+
+
+@st.cache_resource
+def _table_cache() -> _TableCache:
+    return _TableCache()
+
+
+def _stored_match_ids() -> set:
+    ids = pd.read_sql("SELECT match_id FROM swingvision_matches", engine)["match_id"]
+    return set(ids.astype(str))
+
+
+def _read_table(table_name: str, match_ids=None) -> pd.DataFrame:
+    """Read a whole table, or only the rows of `match_ids`."""
+    parse_dates = ["start_time"] if table_name == "swingvision_matches" else None
+    if match_ids is None:
+        df = pd.read_sql(f"SELECT * FROM {table_name}", engine, parse_dates=parse_dates)
     else:
-        sets = pd.DataFrame()
-    return matches, points, shots, sets
+        df = pd.read_sql(
+            text(
+                f"SELECT * FROM {table_name} "
+                "WHERE match_id = ANY(CAST(:ids AS uuid[]))"
+            ),
+            engine,
+            params={"ids": sorted(match_ids)},
+            parse_dates=parse_dates,
+        )
+    if "match_id" in df.columns:
+        df["match_id"] = df["match_id"].astype(str)
+    return df
+
+
+def _append_rows(frame: pd.DataFrame, rows: pd.DataFrame) -> pd.DataFrame:
+    if rows.empty:
+        return frame
+    if frame.empty:
+        return rows
+    # An all-NULL column comes back as object; keep the cached dtype instead
+    for col, dtype in frame.dtypes.items():
+        if col in rows.columns and rows[col].dtype != dtype:
+            try:
+                rows[col] = rows[col].astype(dtype)
+            except (TypeError, ValueError):
+                pass
+    return pd.concat([frame, rows], ignore_index=True)
+
+
+def _refresh_table(cache: _TableCache, table_name: str, current_ids: set):
+    frame = cache.frames.get(table_name)
+    if frame is None:
+        frame = _read_table(table_name)
+        loaded = set(current_ids)
+        if "match_id" in frame.columns:
+            loaded |= set(frame["match_id"])
+        cache.dirty = True
+    else:
+        loaded = cache.loaded_ids[table_name]
+        removed = cache.match_ids - current_ids
+        if removed:
+            frame = frame[~frame["match_id"].isin(removed)].reset_index(drop=True)
+            loaded = loaded - removed
+            cache.dirty = True
+        new_ids = current_ids - loaded
+        if new_ids:
+            frame = _append_rows(frame, _read_table(table_name, new_ids))
+            loaded = loaded | new_ids
+            cache.dirty = True
+    cache.frames[table_name] = frame
+    cache.loaded_ids[table_name] = loaded
+    return frame
+
+
+SNAPSHOT_TABLES = [
+    "swingvision_matches",
+    "swingvision_points",
+    "swingvision_shots",
+    "swingvision_sets",
+    "swingvision_rallies",
+    "swingvision_match_metrics",
+]
+
+
+def _load_snapshot(cache: _TableCache, current_ids: set):
+    """Seed an empty table cache from the on-disk snapshot when it is current."""
+    frames = snapshot.read_snapshot(
+        snapshot.snapshot_token(current_ids), SNAPSHOT_TABLES
+    )
+    if not frames:
+        return
+    cache.frames.update(frames)
+    for table_name in frames:
+        cache.loaded_ids[table_name] = set(current_ids)
+    cache.match_ids = set(current_ids)
+
+
+def forget_table(table_name: str):
+    """Drop a table from the process-wide cache so the next load rereads it."""
+    cache = _table_cache()
+    with cache.lock:
+        cache.frames.pop(table_name, None)
+        cache.loaded_ids.pop(table_name, None)
+
+
+def get_stored_data():
+    """
+    Load matches, points, shots, sets, the per-point rally table and the
+    stored match metrics. The frames are the table cache's own, not copies:
+    do not modify them.
+
+    Rows are fetched incrementally: the process-wide table cache keeps what
+    it has already read and, after an upload, only pulls rows for match_ids
+    it has not seen yet. A cold process starts from the Arrow snapshot when
+    its token matches the current match_ids, and the snapshot is rewritten
+    only when rows were actually read from Postgres.
+    """
+    cache = _table_cache()
+    with cache.lock:
+        current_ids = _stored_match_ids()
+        if not cache.frames:
+            _load_snapshot(cache, current_ids)
+        matches = _refresh_table(cache, "swingvision_matches", current_ids)
+        points = _refresh_table(cache, "swingvision_points", current_ids)
+        shots = _refresh_table(cache, "swingvision_shots", current_ids)
+        if _table_exists("swingvision_sets"):
+            sets = _refresh_table(cache, "swingvision_sets", current_ids)
+        else:
+            sets = pd.DataFrame()
+        if _table_exists("swingvision_rallies"):
+            rallies = _refresh_table(cache, "swingvision_rallies", current_ids)
+        else:
+            rallies = pd.DataFrame()
+        if _table_exists("swingvision_match_metrics"):
+            match_metrics = _refresh_table(
+                cache, "swingvision_match_metrics", current_ids
+            )
+        else:
+            match_metrics = pd.DataFrame()
+        cache.match_ids = current_ids
+        if cache.dirty:
+            snapshot.write_snapshot(snapshot.snapshot_token(current_ids), cache.frames)
+            cache.dirty = False
+    return matches, points, shots, sets, rallies, match_metrics
+
+
+@st.cache_data
+def stored_version() -> str:
+    """
+    snapshot.snapshot_token of the match_ids stored in Postgres: the cache
+    key for everything derived from the stored tables. Uploads clear
+    st.cache_data, so the next rerun sees the new version.
+    """
+    return snapshot.snapshot_token(_stored_match_ids())
 
 
 def sets_needed_to_win(sets_per_match) -> int:
@@ -151,22 +322,302 @@ def format_scoreline(scoreline: str, status: str) -> str:
     return f"({label})"
 
 
+def _tiebreak_pair(htb, gtb):
+    htb = htb or 0
+    gtb = gtb or 0
+    try:
+        return int(htb), int(gtb)
+    except Exception:
+        return 0, 0
+
+
+def summarize_sets(sets: pd.DataFrame) -> pd.DataFrame:
+    """
+    One row per match_id (as str) from the Sets sheet: host_sets, guest_sets,
+    has_draw and the raw scoreline. Same rules as infer_match_status,
+    match_won_from_sets and scoreline_from_sets, in one pass over `sets`.
+    """
+    columns = ["host_sets", "guest_sets", "has_draw", "has_winners", "scoreline"]
+    if sets is None or sets.empty or "match_id" not in sets.columns:
+        return pd.DataFrame(columns=columns)
+
+    ordered = sets.sort_values("set", kind="stable")
+    match_ids = ordered["match_id"].astype(str)
+
+    summary = pd.DataFrame(index=pd.Index(match_ids.unique(), name="match_id"))
+    if "set_winner" in ordered.columns:
+        winners = ordered["set_winner"].astype(str).str.lower().str.strip()
+        flags = pd.DataFrame(
+            {
+                "host_sets": winners == "host",
+                "guest_sets": winners == "guest",
+                "has_draw": winners == "draw",
+            }
+        )
+        grouped = flags.groupby(match_ids.to_numpy(), sort=False)
+        summary["host_sets"] = grouped["host_sets"].sum().astype(int)
+        summary["guest_sets"] = grouped["guest_sets"].sum().astype(int)
+        summary["has_draw"] = grouped["has_draw"].any()
+        summary["has_winners"] = True
+    else:
+        summary["host_sets"] = 0
+        summary["guest_sets"] = 0
+        summary["has_draw"] = False
+        summary["has_winners"] = False
+
+    parts = (
+        ordered["host_score"].astype(int).astype(str)
+        + "-"
+        + ordered["guest_score"].astype(int).astype(str)
+    )
+    tiebreaks = [
+        _tiebreak_pair(htb, gtb)
+        for htb, gtb in zip(
+            ordered.get("host_tiebreak_score", pd.Series(0, index=ordered.index)),
+            ordered.get("guest_tiebreak_score", pd.Series(0, index=ordered.index)),
+        )
+    ]
+    suffix = [f" ({htb}-{gtb})" if htb or gtb else "" for htb, gtb in tiebreaks]
+    parts = parts + pd.Series(suffix, index=ordered.index)
+    summary["scoreline"] = parts.groupby(match_ids.to_numpy(), sort=False).agg(
+        ", ".join
+    )
+    return summary
+
+
+def match_results(matches: pd.DataFrame, sets: pd.DataFrame) -> pd.DataFrame:
+    """
+    match_status, match_won_official and the formatted scoreline for every
+    match, aligned to `matches`. A stored match_status wins over the status
+    inferred from the Sets sheet; unfinished matches get no official result.
+    """
+    summary = summarize_sets(sets).reindex(matches["match_id"].astype(str))
+    has_sets = summary["scoreline"].notna().to_numpy()
+    has_winners = summary["has_winners"].eq(True).to_numpy()
+    host_sets = summary["host_sets"].fillna(0).to_numpy()
+    guest_sets = summary["guest_sets"].fillna(0).to_numpy()
+    has_draw = summary["has_draw"].eq(True).to_numpy()
+
+    if "sets_per_match" in matches.columns:
+        sets_per = matches["sets_per_match"].tolist()
+    else:
+        sets_per = [3] * len(matches)
+    need = np.array([sets_needed_to_win(v) for v in sets_per], dtype=int)
+
+    inferred = np.where(
+        has_winners & (has_draw | (np.maximum(host_sets, guest_sets) < need)),
+        STATUS_UNFINISHED,
+        STATUS_COMPLETED,
+    )
+    if "match_status" in matches.columns:
+        stored = matches["match_status"]
+        text_status = stored.astype(str).str.strip()
+        blank = stored.isna().to_numpy() | (text_status == "").to_numpy()
+        status = np.where(blank, inferred, text_status.to_numpy())
+    else:
+        status = inferred
+
+    completed = np.array([is_completed_status(v) for v in status], dtype=bool)
+    decided = has_winners & ~has_draw & (host_sets != guest_sets) & completed
+    won = [
+        bool(h > g) if d else None for h, g, d in zip(host_sets, guest_sets, decided)
+    ]
+    raw_scores = np.where(has_sets, summary["scoreline"].fillna("").to_numpy(), "")
+    return pd.DataFrame(
+        {
+            "match_status": status,
+            "match_won_official": won,
+            "scoreline": [
+                format_scoreline(score, st_) for score, st_ in zip(raw_scores, status)
+            ],
+        },
+        index=matches.index,
+    )
+
+
+def compact_dtypes(df: pd.DataFrame, dtypes: dict) -> pd.DataFrame:
+    """
+    Apply an in-memory dtype profile. Integer downcasts are skipped when the
+    column has NULLs or values outside the target range.
+    """
+    converted = {}
+    for col, dtype in dtypes.items():
+        if col not in df.columns or df[col].dtype == dtype:
+            continue
+        series = df[col]
+        if pd.api.types.is_integer_dtype(dtype):
+            if not pd.api.types.is_integer_dtype(series.dtype):
+                continue
+            limits = np.iinfo(dtype)
+            if len(series) and (series.min() < limits.min or series.max() > limits.max):
+                continue
+        converted[col] = series.astype(dtype)
+    return df.assign(**converted)
+
+
+def memory_bytes(df: pd.DataFrame) -> int:
+    return int(df.memory_usage(deep=True).sum())
+
+
+def resolve_side_names(side: pd.Series, guest_team: pd.Series) -> pd.Series:
+    """
+    Map SwingVision's host/guest labels to player names: "host" becomes HOST,
+    anything else the row's guest_team.
+    """
+    names = np.where(side.to_numpy() == "host", HOST, guest_team.to_numpy())
+    return pd.Series(names, index=side.index, dtype=object)
+
+
+# Game scores that can't happen in a regular game: tie-break scoring confusion
+IMPOSSIBLE_SCORES = ["AD-AD", "15-AD", "30-AD", "AD-30", "AD-0", "0-AD"]
+
+
+def classify_game_types(points: pd.DataFrame) -> pd.Series:
+    """
+    Game type of every point's game: regular, set_tie_break or
+    match_tie_break. A game with an impossible score is a tie-break (a match
+    tie-break in set 3), so is the only game of set 3, and game 13 is a set
+    tie-break when it is the last game of its set.
+    """
+    games = [points["match_id"], points["set"], points["game"]]
+    sets = [points["match_id"], points["set"]]
+    score = (
+        points["host_game_score"].astype(str)
+        + "-"
+        + points["guest_game_score"].astype(str)
+    )
+    impossible = score.isin(IMPOSSIBLE_SCORES).groupby(games).transform("any")
+    games_in_set = points["game"].groupby(sets).transform("nunique")
+    last_game = points["game"].groupby(sets).transform("max")
+    third_set = points["set"] == 3
+
+    game_type = np.select(
+        [
+            impossible & third_set,
+            impossible,
+            third_set & (games_in_set == 1),
+            (points["game"] == 13) & (points["game"] == last_game),
+        ],
+        ["match_tie_break", "set_tie_break", "match_tie_break", "set_tie_break"],
+        default="regular",
+    )
+    return pd.Series(game_type, index=points.index, dtype=object)
+
+
+def assign_point_keys(points: pd.DataFrame, shots: pd.DataFrame):
+    """
+    Add an int32 `point_key` to points and shots: a dense id per distinct
+    (match_id, set, game, point) in points, in sorted key order. Shots whose
+    point is missing from points get -1.
+    """
+    points = points.assign(
+        point_key=points.groupby(POINT_KEYS, sort=True).ngroup().astype("int32")
+    )
+    index = points.loc[points["point_key"] >= 0, POINT_KEYS + ["point_key"]]
+    index = index.drop_duplicates("point_key")
+    keys = shots[POINT_KEYS].merge(index, on=POINT_KEYS, how="left")["point_key"]
+    shots = shots.assign(point_key=keys.fillna(-1).astype("int32").to_numpy())
+    return points, shots
+
+
+FACT_COLUMNS = [
+    "match_id",
+    "set",
+    "game",
+    "point",
+    "point_winner",
+    "match_server",
+    "serve_state",
+    "detail",
+    "detail_blank",
+    "break_point",
+    "set_point",
+    "host_game_score",
+    "guest_game_score",
+] + RALLY_COLUMNS
+
+FACT_SHOT_COLUMNS = ["player", "type", "stroke", "result"]
+
+
+def build_point_facts(points: pd.DataFrame, shots: pd.DataFrame) -> pd.DataFrame:
+    """
+    Point fact table indexed by point_key: outcome, server, detail, flags and
+    rally features from points (first row when a point is duplicated), plus
+    the shot count and the first/last shot's player, type, stroke and result.
+    """
+    facts = points[points["point_key"] >= 0].drop_duplicates("point_key")
+    facts = facts.set_index("point_key")[
+        [c for c in FACT_COLUMNS if c in points.columns]
+    ].sort_index()
+    facts["won"] = facts["point_winner"] == HOST
+    facts["i_served"] = facts["match_server"] == HOST
+
+    keyed = shots[shots["point_key"] >= 0]
+    n_shots = keyed.groupby("point_key").size()
+    facts["n_shots"] = n_shots.reindex(facts.index, fill_value=0).astype(int)
+
+    ordered = keyed.sort_values(["point_key", "shot"], kind="stable")
+    first = ordered.drop_duplicates("point_key", keep="first").set_index("point_key")
+    last = ordered.drop_duplicates("point_key", keep="last").set_index("point_key")
+    for col in FACT_SHOT_COLUMNS:
+        facts[f"first_{col}"] = first[col].reindex(facts.index)
+        facts[f"last_{col}"] = last[col].reindex(facts.index)
+    return facts
+
+
 @st.cache_data
-def process_data(matches, points, shots, sets=None):
+def get_point_facts(version, _points, _shots):
+    """Point fact table for the processed points/shots of dataset `version`."""
+    return build_point_facts(_points, _shots)
+
+
+def complete_rallies(rallies, shots: pd.DataFrame) -> pd.DataFrame:
+    """
+    Stored rally rows plus rows computed from `shots` for matches that have
+    none yet (uploaded before swingvision_rallies existed and not backfilled).
+    """
+    if rallies is None or rallies.empty:
+        return build_rally_table(shots)
+    rallies = rallies.assign(match_id=rallies["match_id"].astype(str))
+    missing = ~shots["match_id"].isin(set(rallies["match_id"]))
+    if missing.any():
+        rallies = pd.concat(
+            [rallies, build_rally_table(shots[missing])], ignore_index=True
+        )
+    return rallies
+
+
+def complete_coordinates(shots: pd.DataFrame) -> pd.DataFrame:
+    """
+    Shots with the normalized coordinate columns: stored values where the
+    upload or backfill wrote them, computed here for rows that have none.
+    """
+    columns = list(NORMALIZED_COLUMNS.values())
+    if set(columns) <= set(shots.columns):
+        missing = shots[columns].isna().all(axis=1)
+        if not missing.any():
+            return shots
+        computed = normalized_coordinates(shots[missing])
+        return shots.assign(
+            **{col: shots[col].fillna(computed[col]) for col in columns}
+        )
+    return shots.assign(**normalized_coordinates(shots))
+
+
+def prepare_frames(matches, points, shots, sets=None, rallies=None):
+    """
+    Turn the stored tables into the frames the analytics use: player names,
+    flags, normalized coordinates, rally features, official results, point
+    keys and game types.
+    """
     if sets is None:
         sets = pd.DataFrame()
 
     points = points.merge(
         matches[["match_id", "guest_team"]], on="match_id", how="left"
     )
-    points["match_server"] = points.apply(
-        lambda r: "Joao Cassis" if r["match_server"] == "host" else r["guest_team"],
-        axis=1,
-    )
-    points["point_winner"] = points.apply(
-        lambda r: "Joao Cassis" if r["point_winner"] == "host" else r["guest_team"],
-        axis=1,
-    )
+    for col in ("match_server", "point_winner"):
+        points[col] = resolve_side_names(points[col], points["guest_team"])
     points.drop(columns="guest_team", inplace=True)
 
     # Explicit blank Detail handling
@@ -187,44 +638,46 @@ def process_data(matches, points, shots, sets=None):
     shots = shots[shots.stroke != "Feed"].copy()
 
     points["match_id"] = points["match_id"].astype(str)
-    matches["match_id"] = matches["match_id"].astype(str)
+    matches = matches.assign(match_id=matches["match_id"].astype(str))
     shots["match_id"] = shots["match_id"].astype(str)
     if not sets.empty and "match_id" in sets.columns:
         sets = sets.copy()
         sets["match_id"] = sets["match_id"].astype(str)
 
-    # Attach official result, completion status, scoreline
-    match_won = []
-    scorelines = []
-    statuses = []
-    for _, match in matches.iterrows():
-        mid = match["match_id"]
-        sets_per = match.get("sets_per_match", 3)
-        stored_status = match.get("match_status")
-        if (
-            stored_status is None
-            or (isinstance(stored_status, float) and pd.isna(stored_status))
-            or str(stored_status).strip() == ""
-        ):
-            status = infer_match_status(mid, sets, sets_per)
-        else:
-            status = str(stored_status).strip()
-
-        won = match_won_from_sets(mid, sets)
-        if not is_completed_status(status):
-            won = None
+    shots = complete_coordinates(shots)
 
-        raw_score = scoreline_from_sets(mid, sets)
-        match_won.append(won)
-        statuses.append(status)
-        scorelines.append(format_scoreline(raw_score, status))
+    # Per-point rally features from the upload-time rally table
+    rallies = complete_rallies(rallies, shots)
+    points = points.merge(
+        rallies[POINT_KEYS + RALLY_COLUMNS], on=POINT_KEYS, how="left"
+    )
+    points[RALLY_COLUMNS] = points[RALLY_COLUMNS].fillna(0).astype(int)
 
+    # Attach official result, completion status, scoreline
     matches = matches.copy()
-    matches["match_status"] = statuses
-    matches["match_won_official"] = match_won
-    matches["scoreline"] = scorelines
+    results = match_results(matches, sets)
+    matches["match_status"] = results["match_status"].tolist()
+    matches["match_won_official"] = results["match_won_official"].tolist()
+    matches["scoreline"] = results["scoreline"].tolist()
     matches["is_completed"] = matches["match_status"].map(is_completed_status)
 
+    points, shots = assign_point_keys(points, shots)
+    points["game_type"] = classify_game_types(points)
+
+    # These frames are shared by every session (see dataset.get_dataset):
+    # keep them compact and record what that saved.
+    before = {"points": memory_bytes(points), "shots": memory_bytes(shots)}
+    points = compact_dtypes(points, POINT_DTYPES)
+    shots = compact_dtypes(shots, SHOT_DTYPES)
+    points.attrs["memory_report"] = {
+        "before": before["points"],
+        "after": memory_bytes(points),
+    }
+    shots.attrs["memory_report"] = {
+        "before": before["shots"],
+        "after": memory_bytes(shots),
+    }
+
     return matches, points, shots, sets
 
 
@@ -260,314 +713,87 @@ def completed_matches(df: pd.DataFrame) -> pd.DataFrame:
     return df
 
 
-def calculate_match_metrics(matches, points, shots):
-    """Calculate tennis metrics using detail column from points data for accuracy"""
-
-    match_metrics = []
-
-    for _, match in matches.iterrows():
-        match_id = match["match_id"]
-        match_points = points[points["match_id"] == match_id]
-        match_shots = shots[shots["match_id"] == match_id]
-        my_shots = match_shots[match_shots["player"] == HOST]
-
-        metrics = {
-            "match_id": match_id,
-            "match_date": match["match_date"],
-            "opponent": match["guest_team"],
-            "location": match["location"],
-            "scoreline": match.get("scoreline", ""),
-            "match_status": match.get("match_status", STATUS_COMPLETED),
-            "is_completed": bool(match.get("is_completed", True)),
-        }
-
-        # === SERVE METRICS USING DETAIL COLUMN ===
-        serve_points = match_points[match_points["match_server"] == HOST]
-
-        if len(serve_points) > 0:
-            total_serve_points = len(serve_points)
-
-            my_aces = len(
-                serve_points[
-                    (serve_points["point_winner"] == HOST)
-                    & (serve_points["detail"] == "Ace")
-                ]
-            )
-
-            my_service_winners = len(
-                serve_points[
-                    (serve_points["point_winner"] == HOST)
-                    & (serve_points["detail"] == "Service Winner")
-                ]
-            )
-
-            my_double_faults = len(
-                serve_points[
-                    (serve_points["point_winner"] != HOST)
-                    & (serve_points["detail"] == "Double Fault")
-                ]
-            )
-
-            my_first_serves = my_shots[my_shots["type"] == "first_serve"]
-            my_second_serves = my_shots[my_shots["type"] == "second_serve"]
-
-            first_serves_in = len(my_first_serves[my_first_serves["result"] == "In"])
-            first_serve_pct = (
-                first_serves_in / total_serve_points if total_serve_points > 0 else 0
-            )
-
-            first_serve_points_df = serve_points.merge(
-                my_first_serves[my_first_serves["result"] == "In"][
-                    ["set", "game", "point"]
-                ],
-                on=["set", "game", "point"],
-                how="inner",
-            )
-            first_serve_won = len(
-                first_serve_points_df[first_serve_points_df["point_winner"] == HOST]
-            )
-            first_serve_won_pct = (
-                first_serve_won / first_serves_in if first_serves_in > 0 else 0
-            )
+def _with_match_columns(matches, values) -> pd.DataFrame:
+    """Metric values (rows in `matches` order) plus match details and match_won."""
+    records = matches.to_dict("records")
+    match_won = [
+        resolve_match_won(match, pct)
+        for match, pct in zip(records, values["points_won_pct"])
+    ]
+
+    def meta(col, default):
+        if col in matches.columns:
+            return matches[col].tolist()
+        return [default] * len(matches)
+
+    metrics = {
+        "match_id": matches["match_id"].tolist(),
+        "match_date": meta("match_date", None),
+        "opponent": meta("guest_team", None),
+        "location": meta("location", None),
+        "scoreline": meta("scoreline", ""),
+        "match_status": meta("match_status", STATUS_COMPLETED),
+        "is_completed": [bool(v) for v in meta("is_completed", True)],
+    }
+    for metric in MATCH_METRICS:
+        metrics[metric.name] = values[metric.name].to_numpy()
+        if metric.name == "points_won_pct":
+            metrics["match_won"] = match_won
+    return pd.DataFrame(metrics)
 
-            second_serves_in = len(my_second_serves[my_second_serves["result"] == "In"])
-            second_serve_attempts = len(my_second_serves)
-            second_serve_pct = (
-                second_serves_in / second_serve_attempts
-                if second_serve_attempts > 0
-                else 0
-            )
 
-            second_serve_points_df = serve_points.merge(
-                my_second_serves[my_second_serves["result"] == "In"][
-                    ["set", "game", "point"]
-                ],
-                on=["set", "game", "point"],
-                how="inner",
-            )
-            second_serve_won = len(
-                second_serve_points_df[second_serve_points_df["point_winner"] == HOST]
-            )
-            second_serve_won_pct = (
-                second_serve_won / second_serves_in if second_serves_in > 0 else 0
-            )
-
-            first_serve_speed = (
-                my_first_serves["speed"].mean() if len(my_first_serves) > 0 else 0
-            )
-            second_serve_speed = (
-                my_second_serves["speed"].mean() if len(my_second_serves) > 0 else 0
-            )
-
-        else:
-            first_serve_pct = second_serve_pct = 0
-            first_serve_won_pct = second_serve_won_pct = 0
-            first_serve_speed = second_serve_speed = 0
-            my_double_faults = my_aces = my_service_winners = 0
-
-        # === RETURN METRICS ===
-        return_points = match_points[match_points["match_server"] != HOST]
-
-        if len(return_points) > 0:
-            my_first_returns = my_shots[my_shots["type"] == "first_return"]
-            my_second_returns = my_shots[my_shots["type"] == "second_return"]
-
-            first_return_points_df = return_points.merge(
-                my_first_returns[["set", "game", "point"]],
-                on=["set", "game", "point"],
-                how="inner",
-            )
-            first_return_won = len(
-                first_return_points_df[first_return_points_df["point_winner"] == HOST]
-            )
-            first_return_attempts = len(first_return_points_df)
-            first_return_won_pct = (
-                first_return_won / first_return_attempts
-                if first_return_attempts > 0
-                else 0
-            )
+def calculate_match_metrics(matches, points, shots):
+    """Calculate tennis metrics using detail column from points data for accuracy"""
+    if matches.empty:
+        return pd.DataFrame()
+    values = derive_metrics(compute_metrics(matches, points, shots))
+    return _with_match_columns(matches, values)
 
-            second_return_points_df = return_points.merge(
-                my_second_returns[["set", "game", "point"]],
-                on=["set", "game", "point"],
-                how="inner",
-            )
-            second_return_won = len(
-                second_return_points_df[second_return_points_df["point_winner"] == HOST]
-            )
-            second_return_attempts = len(second_return_points_df)
-            second_return_won_pct = (
-                second_return_won / second_return_attempts
-                if second_return_attempts > 0
-                else 0
-            )
 
-            first_return_speed = (
-                my_first_returns["speed"].mean() if len(my_first_returns) > 0 else 0
-            )
-            second_return_speed = (
-                my_second_returns["speed"].mean() if len(my_second_returns) > 0 else 0
+def load_match_metrics(matches, points, shots, stored) -> pd.DataFrame:
+    """
+    calculate_match_metrics from the stored swingvision_match_metrics rows.
+    Only matches without a row of the current MATCH_METRICS_VERSION are
+    computed from their points and shots.
+    """
+    if matches.empty:
+        return pd.DataFrame()
+    ids = matches["match_id"].astype(str)
+    current = pd.DataFrame(columns=["match_id", *MATCH_METRIC_COLUMNS])
+    if not stored.empty and "metrics_version" in stored.columns:
+        current = stored.loc[
+            stored["metrics_version"] == MATCH_METRICS_VERSION,
+            ["match_id", *MATCH_METRIC_COLUMNS],
+        ].assign(match_id=lambda df: df["match_id"].astype(str))
+
+    missing = ~ids.isin(set(current["match_id"]))
+    parts = [current]
+    if missing.any():
+        missing_ids = set(ids[missing])
+        parts.append(
+            compute_metrics(
+                matches[missing].drop_duplicates("match_id"),
+                points[points["match_id"].isin(missing_ids)],
+                shots[shots["match_id"].isin(missing_ids)],
             )
-        else:
-            first_return_won_pct = second_return_won_pct = 0
-            first_return_speed = second_return_speed = 0
-
-        # === WINNERS AND ERRORS FROM DETAIL COLUMN ===
-        my_winner_points = match_points[match_points["point_winner"] == HOST]
-
-        my_forehand_winners = len(
-            my_winner_points[my_winner_points["detail"] == "Forehand Winner"]
-        )
-        my_backhand_winners = len(
-            my_winner_points[my_winner_points["detail"] == "Backhand Winner"]
-        )
-        my_winners = my_forehand_winners + my_backhand_winners
-
-        opponent_winner_points = match_points[match_points["point_winner"] != HOST]
-
-        my_forehand_errors = len(
-            opponent_winner_points[
-                opponent_winner_points["detail"] == "Forehand Unforced Error"
-            ]
-        )
-        my_backhand_errors = len(
-            opponent_winner_points[
-                opponent_winner_points["detail"] == "Backhand Unforced Error"
-            ]
-        )
-        my_unforced_errors = my_forehand_errors + my_backhand_errors
-
-        blank_detail_lost = len(
-            opponent_winner_points[opponent_winner_points["detail_blank"]]
-        )
-        blank_detail_won = len(my_winner_points[my_winner_points["detail_blank"]])
-        blank_detail_total = int(match_points["detail_blank"].sum())
-
-        opponent_forehand_errors = len(
-            my_winner_points[my_winner_points["detail"] == "Forehand Unforced Error"]
-        )
-        opponent_backhand_errors = len(
-            my_winner_points[my_winner_points["detail"] == "Backhand Unforced Error"]
-        )
-        opponent_double_faults = len(
-            my_winner_points[my_winner_points["detail"] == "Double Fault"]
-        )
-        opponent_unforced_errors = (
-            opponent_forehand_errors + opponent_backhand_errors + opponent_double_faults
-        )
-
-        # === BREAK POINTS ===
-        break_point_opportunities = len(
-            match_points[
-                (match_points["match_server"] != HOST) & (match_points["break_point"])
-            ]
-        )
-        break_points_won = len(
-            match_points[
-                (match_points["match_server"] != HOST)
-                & (match_points["break_point"])
-                & (match_points["point_winner"] == HOST)
-            ]
-        )
-        break_points_won_pct = (
-            break_points_won / break_point_opportunities
-            if break_point_opportunities > 0
-            else 0
-        )
-
-        break_points_against = len(
-            match_points[
-                (match_points["match_server"] == HOST) & (match_points["break_point"])
-            ]
-        )
-        break_points_saved = len(
-            match_points[
-                (match_points["match_server"] == HOST)
-                & (match_points["break_point"])
-                & (match_points["point_winner"] == HOST)
-            ]
-        )
-        break_points_saved_pct = (
-            break_points_saved / break_points_against if break_points_against > 0 else 0
-        )
-
-        total_points = len(match_points)
-        points_won = len(match_points[match_points["point_winner"] == HOST])
-        points_won_pct = points_won / total_points if total_points > 0 else 0
-        match_won = resolve_match_won(match, points_won_pct)
-
-        service_games = serve_points.groupby(["set", "game"]).last()
-        service_games_won = len(service_games[service_games["point_winner"] == HOST])
-        service_games_total = len(service_games)
-        service_games_won_pct = (
-            service_games_won / service_games_total if service_games_total > 0 else 0
-        )
-
-        return_games = return_points.groupby(["set", "game"]).last()
-        return_games_won = len(return_games[return_games["point_winner"] == HOST])
-        return_games_total = len(return_games)
-        return_games_won_pct = (
-            return_games_won / return_games_total if return_games_total > 0 else 0
-        )
-
-        winner_error_ratio = (
-            my_winners / my_unforced_errors
-            if my_unforced_errors > 0
-            else float("inf") if my_winners > 0 else 0
-        )
-        forehand_winner_error_ratio = (
-            my_forehand_winners / my_forehand_errors
-            if my_forehand_errors > 0
-            else float("inf") if my_forehand_winners > 0 else 0
-        )
-        backhand_winner_error_ratio = (
-            my_backhand_winners / my_backhand_errors
-            if my_backhand_errors > 0
-            else float("inf") if my_backhand_winners > 0 else 0
-        )
-
-        metrics.update(
-            {
-                "total_points": total_points,
-                "points_won": points_won,
-                "points_won_pct": points_won_pct,
-                "match_won": match_won,
-                "first_serve_pct": first_serve_pct,
-                "first_serve_won_pct": first_serve_won_pct,
-                "first_serve_speed": first_serve_speed,
-                "second_serve_pct": second_serve_pct,
-                "second_serve_won_pct": second_serve_won_pct,
-                "second_serve_speed": second_serve_speed,
-                "double_faults": my_double_faults,
-                "aces": my_aces,
-                "service_winners": my_service_winners,
-                "service_games_won_pct": service_games_won_pct,
-                "first_return_won_pct": first_return_won_pct,
-                "first_return_speed": first_return_speed,
-                "second_return_won_pct": second_return_won_pct,
-                "second_return_speed": second_return_speed,
-                "return_games_won_pct": return_games_won_pct,
-                "winners": my_winners,
-                "forehand_winners": my_forehand_winners,
-                "backhand_winners": my_backhand_winners,
-                "unforced_errors": my_unforced_errors,
-                "forehand_errors": my_forehand_errors,
-                "backhand_errors": my_backhand_errors,
-                "blank_detail_total": blank_detail_total,
-                "blank_detail_lost": blank_detail_lost,
-                "blank_detail_won": blank_detail_won,
-                "opponent_unforced_errors": opponent_unforced_errors,
-                "opponent_forehand_errors": opponent_forehand_errors,
-                "opponent_backhand_errors": opponent_backhand_errors,
-                "opponent_double_faults": opponent_double_faults,
-                "winner_error_ratio": winner_error_ratio,
-                "forehand_winner_error_ratio": forehand_winner_error_ratio,
-                "backhand_winner_error_ratio": backhand_winner_error_ratio,
-                "break_points_won_pct": break_points_won_pct,
-                "break_points_saved_pct": break_points_saved_pct,
-            }
         )
+    values = (
+        pd.concat([part for part in parts if not part.empty], ignore_index=True)
+        .drop_duplicates("match_id")
+        .set_index("match_id")
+        .reindex(ids)
+        .reset_index(drop=True)
+    )
+    stored_dtypes = {col: METRIC_DTYPES[col] for col in MATCH_METRIC_COLUMNS}
+    return _with_match_columns(matches, derive_metrics(values.astype(stored_dtypes)))
 
-        match_metrics.append(metrics)
 
-    return pd.DataFrame(match_metrics)
+def match_metric_rows(matches, points, shots, sets=None, rallies=None):
+    """
+    swingvision_match_metrics rows, tagged with MATCH_METRICS_VERSION, for
+    matches given as their stored (unprocessed) tables.
+    """
+    matches, points, shots, _ = prepare_frames(matches, points, shots, sets, rallies)
+    rows = compute_metrics(matches, points, shots)
+    rows.insert(1, "metrics_version", MATCH_METRICS_VERSION)
+    return rows
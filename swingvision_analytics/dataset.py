@@ -0,0 +1,68 @@
+"""
+Dataset module for SwingVision analytics
+One processed copy of the SwingVision tables per dataset version, shared by
+every session and rerun instead of unpickled out of st.cache_data each time
+"""
+
+import pandas as pd
+import pyarrow as pa
+import streamlit as st
+
+from . import data_processing
+
+
+def freeze_frame(df: pd.DataFrame) -> pd.DataFrame:
+    """
+    Rebuild `df` on Arrow buffers with one block per column. Numeric columns
+    without NULLs come back as zero-copy read-only arrays, so an in-place
+    write raises instead of changing the data of every session.
+    """
+    if df.empty:
+        return df
+    try:
+        table = pa.Table.from_pandas(df, preserve_index=True)
+    except (pa.ArrowException, TypeError, ValueError) as e:
+        print(f"Keeping frame as plain pandas, Arrow conversion failed: {e}")
+        return df
+    frozen = table.to_pandas(split_blocks=True, self_destruct=True)
+    frozen.attrs.update(df.attrs)
+    return frozen
+
+
+class SwingVisionDataset:
+    """
+    Processed frames of one dataset version. The frames are shared: read
+    them freely, but take a .copy() before changing anything in place.
+    """
+
+    def __init__(self, version, matches, points, shots, sets, match_metrics):
+        self.version = version
+        self.matches = freeze_frame(matches)
+        self.points = freeze_frame(points)
+        self.shots = freeze_frame(shots)
+        self.sets = freeze_frame(sets)
+        self.match_metrics = freeze_frame(match_metrics)
+
+    def frames(self):
+        return self.matches, self.points, self.shots, self.sets
+
+
+@st.cache_resource(max_entries=2)
+def get_dataset(version) -> SwingVisionDataset:
+    """
+    Load and process the stored tables once per `version` (see
+    data_processing.stored_version). Two entries so a session still on the
+    previous version does not evict the new one while an upload lands.
+    """
+    matches, points, shots, sets, rallies, stored_metrics = (
+        data_processing.get_stored_data()
+    )
+    if matches.empty:
+        return SwingVisionDataset(version, matches, points, shots, sets, pd.DataFrame())
+    matches, points, shots, sets = data_processing.prepare_frames(
+        matches, points, shots, sets, rallies
+    )
+    match_metrics = data_processing.load_match_metrics(
+        matches, points, shots, stored_metrics
+    )
+    return SwingVisionDataset(version, matches, points, shots, sets, match_metrics)
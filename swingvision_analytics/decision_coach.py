@@ -2,189 +2,164 @@
 Decision Coach — match diagnosis, shot sequences, and training priorities.
 """
 
+import numpy as np
 import pandas as pd
 import streamlit as st
 
-from .data_processing import HOST, resolve_match_won, STATUS_LABELS, is_completed_status
-
-SERVE_TYPES = {"first_serve", "second_serve"}
-RETURN_TYPES = {"first_return", "second_return"}
-PLUS_ONE = {"serve_plus_one", "return_plus_one"}
-DIRECTION_CHANGE_PAIRS = {
-    ("cross court", "down the line"),
-    ("down the line", "cross court"),
-    ("inside out", "down the line"),
-    ("inside in", "cross court"),
-}
-
-
-def _clean_point_shots(point_shots: pd.DataFrame) -> pd.DataFrame:
-    """Drop feeds and keep chronological unique strokes for sequence work."""
-    df = point_shots.sort_values(["shot", "video_time"]).copy()
-    df = df[df["stroke"] != "Feed"]
-    # Drop Type==none noise unless it's the only event at that shot#
-    # Keep serves/returns/in_play/+1; allow none only if stroke is real groundstroke
-    # between serve attempts (rare) — exclude none Serve-like noise
-    mask = df["type"].isin(
-        SERVE_TYPES | RETURN_TYPES | PLUS_ONE | {"in_play"}
-    ) | (
-        (df["type"] == "none")
-        & df["stroke"].isin(["Forehand", "Backhand", "Volley", "Overhead"])
+from .data_processing import (
+    HOST,
+    resolve_match_won,
+    STATUS_LABELS,
+    is_completed_status,
+    get_point_facts,
+)
+from .patterns import MAX_PATTERN, get_pattern_index
+from .rallies import POINT_KEYS, SERVE_TYPES, RETURN_TYPES, clean_rally_shots
+
+CREATED_DETAILS = ["Forehand Winner", "Backhand Winner", "Ace"]
+UNFORCED_DETAILS = ["Forehand Unforced Error", "Backhand Unforced Error"]
+RALLY_BANDS = [(0, 2, "0–2"), (3, 6, "3–6"), (7, 12, "7–12"), (13, 999, "13+")]
+
+
+def _diagnosis_counts(points: pd.DataFrame) -> pd.DataFrame:
+    """Per-match point counts behind a diagnosis, indexed by match_id (str)."""
+    won = points["point_winner"] == HOST
+    lost = ~won
+    detail = points["detail"]
+    blank = (
+        points["detail_blank"].astype(bool)
+        if "detail_blank" in points
+        else pd.Series(False, index=points.index)
     )
-    df = df[mask]
-    return df.drop_duplicates(subset=["video_time", "player", "type", "result"])
-
-
-def _rally_length(point_shots: pd.DataFrame) -> int:
-    strokes = point_shots[~point_shots["stroke"].isin(["Feed", "Serve"])]
-    return len(strokes)
-
-
-def _net_points_breakdown(match_points: pd.DataFrame) -> dict:
-    won = match_points[match_points["point_winner"] == HOST]
-    lost = match_points[match_points["point_winner"] != HOST]
-
-    my_winners = len(
-        won[won["detail"].isin(["Forehand Winner", "Backhand Winner", "Ace"])]
+    serving = points["match_server"] == HOST
+    first = serving & (points["serve_state"] == "first")
+    second = serving & (points["serve_state"] == "second")
+    key = points["match_id"].astype(str)
+    last_set = points.groupby(key)["set"].transform("max")
+    early = points["set"] < last_set
+    late = points["set"] == last_set
+
+    flags = pd.DataFrame(
+        {
+            "total": True,
+            "won": won,
+            "my_winners": won & detail.isin(CREATED_DETAILS),
+            # service winners counted separately for narrative clarity
+            "my_service_winners": won & (detail == "Service Winner"),
+            "opp_errors": won & detail.isin(UNFORCED_DETAILS + ["Double Fault"]),
+            "my_errors": lost & detail.isin(UNFORCED_DETAILS),
+            "my_dfs": lost & (detail == "Double Fault"),
+            "blank_lost": lost & blank,
+            "blank_won": won & blank,
+            "fh_errors": lost & (detail == "Forehand Unforced Error"),
+            "bh_errors": lost & (detail == "Backhand Unforced Error"),
+            "fh_winners": won & (detail == "Forehand Winner"),
+            "bh_winners": won & (detail == "Backhand Winner"),
+            "serving": serving,
+            "serving_won": serving & won,
+            "returning": ~serving,
+            "returning_won": ~serving & won,
+            "first": first,
+            "first_won": first & won,
+            "second": second,
+            "second_won": second & won,
+            "early": early,
+            "early_won": early & won,
+            "late": late,
+            "late_won": late & won,
+        },
+        index=points.index,
     )
-    # service winners counted separately for narrative clarity
-    my_service_winners = len(won[won["detail"] == "Service Winner"])
-    opp_errors = len(
-        won[
-            won["detail"].isin(
-                [
-                    "Forehand Unforced Error",
-                    "Backhand Unforced Error",
-                    "Double Fault",
-                ]
-            )
-        ]
+    counts = flags.groupby(key).sum()
+    counts["last_set"] = last_set.groupby(key).first()
+    counts["n_sets"] = points.groupby(key)["set"].nunique()
+    return counts
+
+
+def _rally_summaries(rallies: pd.DataFrame) -> dict:
+    """Rally-length bands of every match: match_id (str) -> band -> stats."""
+    length = rallies["rally_length"]
+    band = pd.Series(
+        np.select(
+            [length.between(lo, hi) for lo, hi, _ in RALLY_BANDS],
+            [label for _, _, label in RALLY_BANDS],
+            default="",
+        ),
+        index=rallies.index,
     )
-    my_errors = len(
-        lost[
-            lost["detail"].isin(
-                ["Forehand Unforced Error", "Backhand Unforced Error"]
-            )
-        ]
+    in_band = band != ""
+    grouped = rallies.loc[in_band, "won"].groupby(
+        [rallies.loc[in_band, "match_id"].astype(str), band[in_band]]
     )
-    my_dfs = len(lost[lost["detail"] == "Double Fault"])
-    blank_lost = int(lost["detail_blank"].sum()) if "detail_blank" in lost else 0
-    blank_won = int(won["detail_blank"].sum()) if "detail_blank" in won else 0
+    stats = grouped.agg(["size", "sum"])
+    order = {label: i for i, (_, _, label) in enumerate(RALLY_BANDS)}
+    summaries = {}
+    for (match_id, label), size, won in sorted(
+        zip(stats.index, stats["size"], stats["sum"]),
+        key=lambda row: (row[0][0], order[row[0][1]]),
+    ):
+        summaries.setdefault(match_id, {})[label] = {
+            "points": int(size),
+            "won_pct": won / size,
+            "lost": int(size - won),
+        }
+    return summaries
 
-    positive = my_winners + my_service_winners + opp_errors
-    negative = my_errors + my_dfs
-    return {
-        "my_winners": my_winners,
-        "my_service_winners": my_service_winners,
-        "opp_errors": opp_errors,
-        "my_errors": my_errors,
-        "my_dfs": my_dfs,
-        "blank_lost": blank_lost,
-        "blank_won": blank_won,
-        "positive": positive,
-        "negative": negative,
-        "net_points": positive - negative,
-        "fh_errors": len(lost[lost["detail"] == "Forehand Unforced Error"]),
-        "bh_errors": len(lost[lost["detail"] == "Backhand Unforced Error"]),
-        "fh_winners": len(won[won["detail"] == "Forehand Winner"]),
-        "bh_winners": len(won[won["detail"] == "Backhand Winner"]),
-    }
 
+def _rate(won, total):
+    return won / total if total else None
 
-def diagnose_match(match_id, matches, points, shots) -> dict:
-    match = matches[matches["match_id"].astype(str) == str(match_id)].iloc[0]
-    match_points = points[points["match_id"].astype(str) == str(match_id)]
-    match_shots = shots[shots["match_id"].astype(str) == str(match_id)]
 
-    total = len(match_points)
-    won_n = len(match_points[match_points["point_winner"] == HOST])
-    pct = won_n / total if total else 0
+def _diagnose(match, counts: dict, rally_summary: dict) -> dict:
+    """Diagnosis of one match from its _diagnosis_counts row and rally bands."""
+    total = counts["total"]
+    pct = counts["won"] / total if total else 0
     won = resolve_match_won(match, pct)
 
-    np = _net_points_breakdown(match_points)
-
-    # Rally length leaks
-    rally_rows = []
-    for (s, g, p), grp in match_shots.groupby(["set", "game", "point"]):
-        clean = _clean_point_shots(grp)
-        length = _rally_length(clean)
-        pt = match_points[
-            (match_points["set"] == s)
-            & (match_points["game"] == g)
-            & (match_points["point"] == p)
-        ]
-        if pt.empty:
-            continue
-        rally_rows.append(
-            {
-                "rally_length": length,
-                "won": pt.iloc[0]["point_winner"] == HOST,
-                "detail": pt.iloc[0]["detail"],
-            }
+    net = {
+        col: counts[col]
+        for col in (
+            "my_winners",
+            "my_service_winners",
+            "opp_errors",
+            "my_errors",
+            "my_dfs",
+            "blank_lost",
+            "blank_won",
         )
-    rally_df = pd.DataFrame(rally_rows)
-    rally_summary = {}
-    if not rally_df.empty:
-        bins = [(0, 2, "0–2"), (3, 6, "3–6"), (7, 12, "7–12"), (13, 999, "13+")]
-        for lo, hi, label in bins:
-            sub = rally_df[
-                (rally_df["rally_length"] >= lo) & (rally_df["rally_length"] <= hi)
-            ]
-            if len(sub) == 0:
-                continue
-            rally_summary[label] = {
-                "points": len(sub),
-                "won_pct": sub["won"].mean(),
-                "lost": int((~sub["won"]).sum()),
-            }
-
-    # Serve / return
-    serving = match_points[match_points["match_server"] == HOST]
-    returning = match_points[match_points["match_server"] != HOST]
-    first_serve_pts = serving[serving["serve_state"] == "first"]
-    second_serve_pts = serving[serving["serve_state"] == "second"]
+    }
+    net["positive"] = net["my_winners"] + net["my_service_winners"] + net["opp_errors"]
+    net["negative"] = net["my_errors"] + net["my_dfs"]
+    net["net_points"] = net["positive"] - net["negative"]
+    for col in ("fh_errors", "bh_errors", "fh_winners", "bh_winners"):
+        net[col] = counts[col]
 
     serve_stats = {
-        "serve_won_pct": (serving["point_winner"] == HOST).mean()
-        if len(serving)
-        else None,
-        "return_won_pct": (returning["point_winner"] == HOST).mean()
-        if len(returning)
-        else None,
-        "first_serve_won_pct": (first_serve_pts["point_winner"] == HOST).mean()
-        if len(first_serve_pts)
-        else None,
-        "second_serve_won_pct": (second_serve_pts["point_winner"] == HOST).mean()
-        if len(second_serve_pts)
-        else None,
-        "second_serve_points": len(second_serve_pts),
+        "serve_won_pct": _rate(counts["serving_won"], counts["serving"]),
+        "return_won_pct": _rate(counts["returning_won"], counts["returning"]),
+        "first_serve_won_pct": _rate(counts["first_won"], counts["first"]),
+        "second_serve_won_pct": _rate(counts["second_won"], counts["second"]),
+        "second_serve_points": counts["second"],
     }
 
     # Late match (last set)
-    last_set = match_points["set"].max() if not match_points.empty else None
     late = {}
-    if last_set is not None and match_points["set"].nunique() > 1:
-        early = match_points[match_points["set"] < last_set]
-        late_pts = match_points[match_points["set"] == last_set]
+    if counts["n_sets"] > 1:
         late = {
-            "early_won_pct": (early["point_winner"] == HOST).mean()
-            if len(early)
-            else None,
-            "late_won_pct": (late_pts["point_winner"] == HOST).mean()
-            if len(late_pts)
-            else None,
-            "last_set": int(last_set),
+            "early_won_pct": _rate(counts["early_won"], counts["early"]),
+            "late_won_pct": _rate(counts["late_won"], counts["late"]),
+            "last_set": int(counts["last_set"]),
         }
 
     paragraphs = _build_diagnosis_text(
-        match, won, pct, np, rally_summary, serve_stats, late
+        match, won, pct, net, rally_summary, serve_stats, late
     )
 
     return {
         "match": match,
         "won": won,
         "points_won_pct": pct,
-        "net": np,
+        "net": net,
         "rally_summary": rally_summary,
         "serve_stats": serve_stats,
         "late": late,
@@ -192,6 +167,46 @@ def diagnose_match(match_id, matches, points, shots) -> dict:
     }
 
 
+def diagnose_matches(version, matches, points, shots, match_ids=None) -> dict:
+    """
+    Diagnosis of every match in `matches` (or only `match_ids`), keyed by
+    match_id as str, from one pass of per-match counts over points and
+    rally facts.
+    """
+    facts = get_point_facts(version, points, shots)
+    keys = matches["match_id"].astype(str)
+    if match_ids is not None:
+        wanted = keys.isin({str(m) for m in match_ids})
+        matches, keys = matches[wanted], keys[wanted]
+    selected = set(keys)
+    points = points[points["match_id"].astype(str).isin(selected)]
+    rallies = facts[
+        (facts["n_shots"] > 0) & facts["match_id"].astype(str).isin(selected)
+    ]
+    counts = (
+        _diagnosis_counts(points)
+        .reindex(pd.Index(selected, dtype=object), fill_value=0)
+        .to_dict("index")
+    )
+    summaries = _rally_summaries(rallies)
+
+    diagnoses = {}
+    for key, (_, match) in zip(keys, matches.iterrows()):
+        if key not in diagnoses:
+            diagnoses[key] = _diagnose(match, counts[key], summaries.get(key, {}))
+    return diagnoses
+
+
+@st.cache_data
+def get_diagnoses(version, _matches, _points, _shots) -> dict:
+    """diagnose_matches over every match of dataset `version`."""
+    return diagnose_matches(version, _matches, _points, _shots)
+
+
+def diagnose_match(version, match_id, matches, points, shots) -> dict:
+    return get_diagnoses(version, matches, points, shots)[str(match_id)]
+
+
 def _fmt_pct(x):
     if x is None or (isinstance(x, float) and pd.isna(x)):
         return "n/a"
@@ -286,98 +301,91 @@ def _build_diagnosis_text(match, won, pct, np, rally_summary, serve_stats, late)
     return lines
 
 
+def _as_object(df: pd.DataFrame, columns) -> pd.DataFrame:
+    return df.astype({col: object for col in columns})
+
+
+def _serve_plus_one_rows(served: pd.DataFrame) -> pd.DataFrame:
+    """My last serve in and my first serve+1 of every point I served."""
+    serves = served[served["type"].isin(SERVE_TYPES) & (served["result"] == "In")]
+    serves = serves.groupby(POINT_KEYS).tail(1)
+    plus = served[served["type"] == "serve_plus_one"].groupby(POINT_KEYS).head(1)
+    rows = serves[POINT_KEYS + ["type", "direction", "won"]].merge(
+        plus[POINT_KEYS + ["stroke", "direction", "result"]],
+        on=POINT_KEYS,
+        how="left",
+        suffixes=("", "_plus"),
+    )
+    rows = rows.rename(
+        columns={
+            "type": "serve_type",
+            "direction": "serve_dir",
+            "stroke": "plus_stroke",
+            "direction_plus": "plus_dir",
+            "result": "plus_result",
+        }
+    )
+    return _as_object(
+        rows, ["serve_type", "serve_dir", "plus_stroke", "plus_dir", "plus_result"]
+    )
+
+
+def _return_rows(received: pd.DataFrame) -> pd.DataFrame:
+    """My first return of every point I received."""
+    returns = received[received["type"].isin(RETURN_TYPES)]
+    rows = returns.groupby(POINT_KEYS).head(1)[
+        ["type", "direction", "stroke", "bounce_depth", "result", "won"]
+    ]
+    rows = rows.rename(columns={"type": "return_type"})
+    return _as_object(
+        rows, ["return_type", "direction", "stroke", "bounce_depth", "result"]
+    )
+
+
+def _direction_change_rows(mine: pd.DataFrame) -> pd.DataFrame:
+    """My groundstrokes hit in a different direction than my previous one."""
+    ground = mine[
+        mine["stroke"].isin(["Forehand", "Backhand"])
+        & mine["direction"].notna()
+        & (mine["direction"] != "---")
+    ]
+    ground = _as_object(ground, ["stroke", "direction", "result"])
+    from_dir = ground.groupby(POINT_KEYS)["direction"].shift()
+    changed = from_dir.notna() & (ground["direction"] != from_dir)
+    rows = ground[changed]
+    return pd.DataFrame(
+        {
+            "stroke": rows["stroke"],
+            "from_dir": from_dir[changed],
+            "to_dir": rows["direction"],
+            "result": rows["result"],
+            "error": rows["result"].isin(["Out", "Net"]),
+        }
+    )
+
+
 @st.cache_data
-def analyze_sequences(points, shots, match_id=None) -> dict:
+def analyze_sequences(version, _points, _shots, match_id=None) -> dict:
     """Serve→+1, return→outcome, and direction-change error patterns."""
-    pts = points
-    sh = shots
+    sh = _shots
     if match_id is not None:
-        pts = points[points["match_id"].astype(str) == str(match_id)]
-        sh = shots[shots["match_id"].astype(str) == str(match_id)]
-
-    serve_plus_one = []
-    return_patterns = []
-    direction_changes = []
-
-    for (mid, s, g, p), grp in sh.groupby(["match_id", "set", "game", "point"]):
-        clean = _clean_point_shots(grp)
-        if clean.empty:
-            continue
-        pt = pts[
-            (pts["match_id"] == mid)
-            & (pts["set"] == s)
-            & (pts["game"] == g)
-            & (pts["point"] == p)
-        ]
-        if pt.empty:
-            continue
-        won = pt.iloc[0]["point_winner"] == HOST
-        i_served = pt.iloc[0]["match_server"] == HOST
-
-        my_rows = clean[clean["player"] == HOST]
-        # Serve + 1 when I serve
-        serve = my_rows[my_rows["type"].isin(SERVE_TYPES) & (my_rows["result"] == "In")]
-        plus = my_rows[my_rows["type"] == "serve_plus_one"]
-        if i_served and not serve.empty:
-            serve_row = serve.iloc[-1]
-            plus_dir = plus.iloc[0]["direction"] if not plus.empty else None
-            plus_stroke = plus.iloc[0]["stroke"] if not plus.empty else None
-            plus_result = plus.iloc[0]["result"] if not plus.empty else None
-            serve_plus_one.append(
-                {
-                    "serve_type": serve_row["type"],
-                    "serve_dir": serve_row["direction"],
-                    "plus_stroke": plus_stroke,
-                    "plus_dir": plus_dir,
-                    "plus_result": plus_result,
-                    "won": won,
-                }
-            )
+        sh = _shots[_shots["match_id"].astype(str) == str(match_id)]
 
-        # Return → outcome
-        ret = my_rows[my_rows["type"].isin(RETURN_TYPES)]
-        if not i_served and not ret.empty:
-            r = ret.iloc[0]
-            return_patterns.append(
-                {
-                    "return_type": r["type"],
-                    "direction": r["direction"],
-                    "stroke": r["stroke"],
-                    "bounce_depth": r.get("bounce_depth"),
-                    "result": r["result"],
-                    "won": won,
-                }
-            )
+    # One row per clean shot of mine, in rally order, with its point's outcome
+    facts = get_point_facts(version, _points, _shots)
+    clean = clean_rally_shots(sh).dropna(subset=POINT_KEYS)
+    mine = clean[clean["player"] == HOST].join(
+        facts[["won", "i_served"]], on="point_key", how="inner"
+    )
+    i_served = mine["i_served"].astype(bool)
 
-        # Direction changes on my consecutive groundstrokes
-        ground = my_rows[
-            my_rows["stroke"].isin(["Forehand", "Backhand"])
-            & my_rows["direction"].notna()
-            & (my_rows["direction"] != "---")
-        ].sort_values("shot")
-        prev = None
-        for _, row in ground.iterrows():
-            if prev is not None:
-                pair = (prev["direction"], row["direction"])
-                changed = pair in DIRECTION_CHANGE_PAIRS or (
-                    prev["direction"] != row["direction"]
-                )
-                if changed:
-                    direction_changes.append(
-                        {
-                            "stroke": row["stroke"],
-                            "from_dir": prev["direction"],
-                            "to_dir": row["direction"],
-                            "result": row["result"],
-                            "error": row["result"] in ("Out", "Net"),
-                        }
-                    )
-            prev = row
-
-    def _rate_table(rows, group_cols, success_col="won"):
-        if not rows:
+    serve_plus_one = _serve_plus_one_rows(mine[i_served])
+    return_patterns = _return_rows(mine[~i_served])
+    direction_changes = _direction_change_rows(mine)
+
+    def _rate_table(df, group_cols, success_col="won"):
+        if df.empty:
             return pd.DataFrame()
-        df = pd.DataFrame(rows)
         g = (
             df.groupby(group_cols, dropna=False)
             .agg(n=(success_col, "size"), won=(success_col, "sum"))
@@ -394,7 +402,7 @@ def analyze_sequences(points, shots, match_id=None) -> dict:
         return_patterns, ["return_type", "stroke", "direction", "bounce_depth"]
     )
 
-    dir_df = pd.DataFrame(direction_changes)
+    dir_df = direction_changes
     if not dir_df.empty:
         dir_summary = (
             dir_df.groupby(["stroke", "from_dir", "to_dir"])
@@ -420,18 +428,84 @@ def analyze_sequences(points, shots, match_id=None) -> dict:
     }
 
 
-def _priority_candidates(points, shots) -> list:
-    """Score leak categories across the provided points/shots window."""
-    candidates = []
+# Per-match counts behind the training priorities; any window of matches
+# is answered by summing their rows
+LEAK_COLUMNS = [
+    "sets",
+    "fh_ue",
+    "bh_ue",
+    "df",
+    "second_serve_pts",
+    "second_serve_lost",
+    "returns_in",
+    "short_returns",
+    "short_returns_lost",
+    "neutral_fh",
+]
+
+
+def build_leak_counts(points, shots, facts) -> pd.DataFrame:
+    """LEAK_COLUMNS per match, indexed by match_id (str)."""
     if points.empty:
-        return candidates
+        return pd.DataFrame(columns=LEAK_COLUMNS, dtype="int64")
+
+    def per_match(mask, frame=points):
+        return frame.loc[mask, "match_id"].astype(str).value_counts()
+
+    lost = points["point_winner"] != HOST
+    seconds = (points["match_server"] == HOST) & (points["serve_state"] == "second")
+
+    my_returns = shots[
+        (shots["player"] == HOST)
+        & (shots["type"].isin(RETURN_TYPES))
+        & (shots["result"] == "In")
+    ]
+    # Join short returns to point outcomes
+    short = my_returns[my_returns["bounce_depth"] == "short"].merge(
+        points[POINT_KEYS + ["point_winner"]], on=POINT_KEYS, how="left"
+    )
 
-    lost = points[points["point_winner"] != HOST]
-    n_sets = max(points.groupby("match_id")["set"].nunique().sum(), 1)
+    # Neutral rally FH errors (rally 3-6, FH UE)
+    neutral_fh = (
+        (facts["n_shots"] > 0)
+        & facts["rally_length"].between(3, 6)
+        & ~facts["won"]
+        & (facts["detail"] == "Forehand Unforced Error")
+    )
 
-    fh = len(lost[lost["detail"] == "Forehand Unforced Error"])
-    bh = len(lost[lost["detail"] == "Backhand Unforced Error"])
-    dfs = len(lost[lost["detail"] == "Double Fault"])
+    counts = pd.DataFrame(
+        {
+            "sets": points.groupby(points["match_id"].astype(str))["set"].nunique(),
+            "fh_ue": per_match(lost & (points["detail"] == "Forehand Unforced Error")),
+            "bh_ue": per_match(lost & (points["detail"] == "Backhand Unforced Error")),
+            "df": per_match(lost & (points["detail"] == "Double Fault")),
+            "second_serve_pts": per_match(seconds),
+            "second_serve_lost": per_match(seconds & lost),
+            "returns_in": per_match(slice(None), my_returns),
+            "short_returns": per_match(slice(None), short),
+            "short_returns_lost": per_match(short["point_winner"] != HOST, short),
+            "neutral_fh": per_match(neutral_fh, facts),
+        },
+        columns=LEAK_COLUMNS,
+    )
+    return counts.fillna(0).astype("int64")
+
+
+@st.cache_data
+def get_leak_counts(version, _points, _shots) -> pd.DataFrame:
+    """build_leak_counts for the processed points/shots of dataset `version`."""
+    facts = get_point_facts(version, _points, _shots)
+    return build_leak_counts(_points, _shots, facts)
+
+
+def _priority_candidates(counts: pd.Series) -> list:
+    """Score leak categories from the summed leak counts of a match window."""
+    candidates = []
+    n_sets = max(int(counts["sets"]), 1)
+
+    fh = int(counts["fh_ue"])
+    bh = int(counts["bh_ue"])
+    dfs = int(counts["df"])
 
     if fh:
         candidates.append(
@@ -465,73 +539,41 @@ def _priority_candidates(points, shots) -> list:
         )
 
     # Second serve points won
-    seconds = points[
-        (points["match_server"] == HOST) & (points["serve_state"] == "second")
-    ]
-    if len(seconds) >= 8:
-        won_pct = (seconds["point_winner"] == HOST).mean()
+    seconds = int(counts["second_serve_pts"])
+    if seconds >= 8:
+        leak = int(counts["second_serve_lost"])
+        won_pct = (seconds - leak) / seconds
         if won_pct < 0.45:
-            leak = int((seconds["point_winner"] != HOST).sum())
             candidates.append(
                 {
                     "key": "second_serve_pts",
                     "title": "Second-serve point toughness",
                     "impact": leak,
                     "per_set": leak / n_sets,
-                    "detail": f"Won only {won_pct:.0%} of {len(seconds)} second-serve points.",
+                    "detail": f"Won only {won_pct:.0%} of {seconds} second-serve points.",
                 }
             )
 
     # Return depth: short returns when returning
-    my_returns = shots[
-        (shots["player"] == HOST)
-        & (shots["type"].isin(RETURN_TYPES))
-        & (shots["result"] == "In")
-    ]
-    if len(my_returns) >= 10:
-        short = my_returns[my_returns["bounce_depth"] == "short"]
-        # Join to point outcomes
-        merged = short.merge(
-            points[["match_id", "set", "game", "point", "point_winner"]],
-            on=["match_id", "set", "game", "point"],
-            how="left",
-        )
-        if len(merged) >= 5:
-            lose_pct = (merged["point_winner"] != HOST).mean()
-            if lose_pct >= 0.55:
-                candidates.append(
-                    {
-                        "key": "short_return",
-                        "title": "Return depth (too many short returns)",
-                        "impact": int((merged["point_winner"] != HOST).sum()),
-                        "per_set": int((merged["point_winner"] != HOST).sum()) / n_sets,
-                        "detail": (
-                            f"{len(merged)} short in-play returns; lost "
-                            f"{lose_pct:.0%} of those points."
-                        ),
-                    }
-                )
+    short = int(counts["short_returns"])
+    if counts["returns_in"] >= 10 and short >= 5:
+        short_lost = int(counts["short_returns_lost"])
+        lose_pct = short_lost / short
+        if lose_pct >= 0.55:
+            candidates.append(
+                {
+                    "key": "short_return",
+                    "title": "Return depth (too many short returns)",
+                    "impact": short_lost,
+                    "per_set": short_lost / n_sets,
+                    "detail": (
+                        f"{short} short in-play returns; lost "
+                        f"{lose_pct:.0%} of those points."
+                    ),
+                }
+            )
 
-    # Neutral rally FH errors (rally 3-6, FH UE)
-    mid_errors = 0
-    for (mid, s, g, p), grp in shots.groupby(["match_id", "set", "game", "point"]):
-        clean = _clean_point_shots(grp)
-        length = _rally_length(clean)
-        if not (3 <= length <= 6):
-            continue
-        pt = points[
-            (points["match_id"] == mid)
-            & (points["set"] == s)
-            & (points["game"] == g)
-            & (points["point"] == p)
-        ]
-        if pt.empty:
-            continue
-        if (
-            pt.iloc[0]["point_winner"] != HOST
-            and pt.iloc[0]["detail"] == "Forehand Unforced Error"
-        ):
-            mid_errors += 1
+    mid_errors = int(counts["neutral_fh"])
     if mid_errors >= 3:
         candidates.append(
             {
@@ -547,7 +589,13 @@ def _priority_candidates(points, shots) -> list:
     return candidates
 
 
-def compute_priorities(matches, points, shots, recent_n=5) -> dict:
+def _window_counts(counts: pd.DataFrame, window: pd.DataFrame) -> pd.Series:
+    """Leak counts summed over the matches in `window`."""
+    ids = window["match_id"].astype(str)
+    return counts.reindex(ids, fill_value=0).sum()
+
+
+def compute_priorities(version, matches, points, shots, recent_n=5) -> dict:
     """Top 1–2 priorities from recent matches vs previous window."""
     if matches.empty:
         return {"priorities": [], "progress": []}
@@ -556,21 +604,14 @@ def compute_priorities(matches, points, shots, recent_n=5) -> dict:
     recent = ordered.tail(recent_n)
     previous = ordered.iloc[: -recent_n].tail(recent_n) if len(ordered) > recent_n else None
 
-    recent_ids = set(recent["match_id"].astype(str))
-    recent_pts = points[points["match_id"].astype(str).isin(recent_ids)]
-    recent_shots = shots[shots["match_id"].astype(str).isin(recent_ids)]
-    recent_cands = _priority_candidates(recent_pts, recent_shots)
+    counts = get_leak_counts(version, points, shots)
+    recent_cands = _priority_candidates(_window_counts(counts, recent))
     priorities = recent_cands[:2]
 
     progress = []
     if previous is not None and not previous.empty:
-        prev_ids = set(previous["match_id"].astype(str))
         prev_cands = {
-            c["key"]: c
-            for c in _priority_candidates(
-                points[points["match_id"].astype(str).isin(prev_ids)],
-                shots[shots["match_id"].astype(str).isin(prev_ids)],
-            )
+            c["key"]: c for c in _priority_candidates(_window_counts(counts, previous))
         }
         for p in priorities:
             before = prev_cands.get(p["key"])
@@ -661,7 +702,63 @@ def _weekly_plan(priority: dict) -> list:
     )
 
 
-def render_decision_coach_tab(matches, points, shots, sets=None):
+def warm_cache(version, matches, points, shots):
+    """Run this tab's cached analytics for its default selections."""
+    if matches.empty:
+        return
+    latest = matches.sort_values("match_date", ascending=False).iloc[0]["match_id"]
+    get_diagnoses(version, matches, points, shots)
+    analyze_sequences(version, points, shots, latest)
+    get_pattern_index(version, shots, get_point_facts(version, points, shots))
+    compute_priorities(version, matches, points, shots)
+
+
+def render_pattern_explorer(version, points, shots, match_id=None):
+    """Build a shot pattern step by step and see how those points end."""
+    st.subheader("🧩 Pattern explorer")
+    facts = get_point_facts(version, points, shots)
+    index = get_pattern_index(version, shots, facts)
+    within = None
+    if match_id is not None:
+        in_match = facts["match_id"].astype(str) == str(match_id)
+        within = facts.index[in_match].to_numpy()
+
+    opening = st.toggle("Pattern starts the point", value=True)
+    pattern = []
+    for step, col in enumerate(st.columns(MAX_PATTERN)):
+        options = index.continuations(pattern, opening, within)
+        if options.empty:
+            break
+        with col:
+            token = st.selectbox(
+                f"Shot {step + 1}",
+                ["—"] + options["next"].tolist(),
+                key=f"pattern_step_{step}",
+            )
+        if token == "—":
+            break
+        pattern.append(token)
+
+    if not pattern:
+        st.info("Pick a first shot to see how those points end.")
+        return
+
+    stats = index.stats(pattern, opening, within)
+    st.markdown(f"**{' → '.join(pattern)}**")
+    c1, c2 = st.columns(2)
+    c1.metric("Points", stats["points"])
+    c2.metric("Won", _fmt_pct(stats["won_pct"]))
+    following = index.continuations(pattern, opening, within)
+    if not following.empty:
+        st.markdown("What came next:")
+        st.dataframe(
+            following.style.format({"won_pct": "{:.0%}"}),
+            width="stretch",
+            hide_index=True,
+        )
+
+
+def render_decision_coach_tab(version, matches, points, shots, sets=None):
     st.header("🧭 Decision Coach")
     st.caption(
         "Why points were won or lost, which patterns matter, and what to train next."
@@ -685,7 +782,7 @@ def render_decision_coach_tab(matches, points, shots, sets=None):
     )
     match_id = ordered.iloc[idx]["match_id"]
 
-    diagnosis = diagnose_match(match_id, matches, points, shots)
+    diagnosis = diagnose_match(version, match_id, matches, points, shots)
 
     st.subheader("Match diagnosis")
     for p in diagnosis["paragraphs"]:
@@ -728,7 +825,7 @@ def render_decision_coach_tab(matches, points, shots, sets=None):
         horizontal=True,
     )
     seq_match = match_id if scope == "This match" else None
-    seq = analyze_sequences(points, shots, seq_match)
+    seq = analyze_sequences(version, points, shots, seq_match)
 
     col_a, col_b = st.columns(2)
     with col_a:
@@ -775,9 +872,11 @@ def render_decision_coach_tab(matches, points, shots, sets=None):
             hide_index=True,
         )
 
+    render_pattern_explorer(version, points, shots, seq_match)
+
     st.subheader("Training priorities")
     recent_n = st.slider("Recent match window", 3, 10, 5)
-    pri = compute_priorities(matches, points, shots, recent_n=recent_n)
+    pri = compute_priorities(version, matches, points, shots, recent_n=recent_n)
 
     if not pri["priorities"]:
         st.success("No clear high-impact leaks in the recent window.")
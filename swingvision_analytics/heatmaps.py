@@ -0,0 +1,249 @@
+"""
+Heatmaps module for SwingVision analytics
+Serve placement, return depth and groundstroke heatmaps from per-match count
+grids, so any selection of matches adds grids instead of re-binning shots
+"""
+
+import numpy as np
+import pandas as pd
+import plotly.graph_objects as go
+import streamlit as st
+
+from .court import COURT_LENGTH
+
+HOST = "Joao Cassis"
+
+SERVE_TYPES = ["first_serve", "second_serve"]
+RETURN_TYPES = ["first_return", "second_return"]
+GROUNDSTROKES = ["Forehand", "Backhand"]
+
+# Which shots feed each heatmap and which normalized coordinates it bins
+HEATMAPS = {
+    "Serve placement": {
+        "types": SERVE_TYPES,
+        "coordinates": ("bounce_x_n", "bounce_y_n"),
+    },
+    "Return depth": {
+        "types": RETURN_TYPES,
+        "coordinates": ("bounce_x_n", "bounce_y_n"),
+    },
+    "Groundstroke landing": {
+        "strokes": GROUNDSTROKES,
+        "coordinates": ("bounce_x_n", "bounce_y_n"),
+    },
+    "Groundstroke contact": {
+        "strokes": GROUNDSTROKES,
+        "coordinates": ("hit_x_n", "hit_y_n"),
+    },
+}
+
+# Shared cell edges (meters) for every grid, so grids can be added. Points
+# outside the edges are clamped into the outer cells.
+X_EDGES = np.linspace(-7.0, 7.0, 29)
+Y_EDGES = np.linspace(-4.0, COURT_LENGTH + 4.0, 33)
+GRID_SHAPE = (len(X_EDGES) - 1, len(Y_EDGES) - 1)
+
+KEY_COLUMNS = ["match_id", "heatmap", "mine", "stroke", "type", "result"]
+
+# Court markings in normalized coordinates: (x0, y0, x1, y1)
+COURT_LINES = [
+    (-5.485, 0.0, -5.485, COURT_LENGTH),
+    (5.485, 0.0, 5.485, COURT_LENGTH),
+    (-4.115, 0.0, -4.115, COURT_LENGTH),
+    (4.115, 0.0, 4.115, COURT_LENGTH),
+    (-5.485, 0.0, 5.485, 0.0),
+    (-5.485, COURT_LENGTH, 5.485, COURT_LENGTH),
+    (-4.115, 5.485, 4.115, 5.485),
+    (-4.115, COURT_LENGTH - 5.485, 4.115, COURT_LENGTH - 5.485),
+    (0.0, 5.485, 0.0, COURT_LENGTH - 5.485),
+]
+NET_Y = COURT_LENGTH / 2
+
+
+def _cell(values, edges) -> np.ndarray:
+    """Cell index of each value, np.histogram2d-style, clamped into the grid."""
+    index = np.searchsorted(edges, np.asarray(values, dtype=float), side="right") - 1
+    return np.clip(index, 0, len(edges) - 2)
+
+
+def build_heatmap_grids(shots: pd.DataFrame):
+    """
+    Count grids over X_EDGES x Y_EDGES, one per (match_id, heatmap, mine,
+    stroke, type, result), binned for all of them in one pass. Returns
+    (keys, cells): keys has KEY_COLUMNS plus the shot count, one row per
+    grid; cells holds the non-empty cells of every grid as (grid, cell,
+    count) with `grid` the row number in keys and `cell` = ix * ny + iy.
+    """
+    parts = []
+    for name, spec in HEATMAPS.items():
+        selected = pd.Series(True, index=shots.index)
+        if "types" in spec:
+            selected &= shots["type"].isin(spec["types"])
+        if "strokes" in spec:
+            selected &= shots["stroke"].isin(spec["strokes"])
+        x_col, y_col = spec["coordinates"]
+        rows = shots[selected].dropna(subset=[x_col, y_col])
+        parts.append(
+            pd.DataFrame(
+                {
+                    "match_id": rows["match_id"].astype(str),
+                    "heatmap": name,
+                    "mine": (rows["player"] == HOST).to_numpy(),
+                    "stroke": rows["stroke"].astype(object),
+                    "type": rows["type"].astype(object),
+                    "result": rows["result"].astype(object),
+                    "x": rows[x_col].to_numpy(),
+                    "y": rows[y_col].to_numpy(),
+                }
+            )
+        )
+    binned = pd.concat(parts, ignore_index=True)
+
+    grouped = binned.groupby(KEY_COLUMNS, dropna=False)
+    keys = grouped.size().rename("shots").reset_index()
+
+    n_cells = GRID_SHAPE[0] * GRID_SHAPE[1]
+    flat = grouped.ngroup().to_numpy() * n_cells
+    flat += _cell(binned["x"], X_EDGES) * GRID_SHAPE[1] + _cell(binned["y"], Y_EDGES)
+    flat, counts = np.unique(flat, return_counts=True)
+    cells = pd.DataFrame(
+        {
+            "grid": (flat // n_cells).astype(np.int32),
+            "cell": (flat % n_cells).astype(np.int32),
+            "count": counts.astype(np.int32),
+        }
+    )
+    return keys, cells
+
+
+@st.cache_resource(max_entries=2)
+def get_heatmap_grids(version, _shots):
+    """build_heatmap_grids for dataset `version`, shared: do not modify."""
+    return build_heatmap_grids(_shots)
+
+
+def sum_grids(
+    keys,
+    cells,
+    heatmap,
+    mine=True,
+    match_ids=None,
+    strokes=None,
+    types=None,
+    results=None,
+) -> np.ndarray:
+    """
+    Sum of the grids of `heatmap` in a selection, as a GRID_SHAPE array;
+    None or empty means no filter on that key.
+    """
+    selected = (keys["heatmap"] == heatmap) & (keys["mine"] == mine)
+    for col, allowed in (
+        ("match_id", match_ids),
+        ("stroke", strokes),
+        ("type", types),
+        ("result", results),
+    ):
+        if allowed:
+            selected &= keys[col].isin(allowed)
+    rows = selected.to_numpy()[cells["grid"].to_numpy()]
+    grid = np.bincount(
+        cells["cell"].to_numpy()[rows],
+        weights=cells["count"].to_numpy()[rows],
+        minlength=GRID_SHAPE[0] * GRID_SHAPE[1],
+    )
+    return grid.astype(np.int64).reshape(GRID_SHAPE)
+
+
+def create_heatmap_figure(grid, title):
+    x_centers = (X_EDGES[:-1] + X_EDGES[1:]) / 2
+    y_centers = (Y_EDGES[:-1] + Y_EDGES[1:]) / 2
+    fig = go.Figure(
+        go.Heatmap(
+            x=x_centers,
+            y=y_centers,
+            z=grid.T,
+            colorscale="YlOrRd",
+            hovertemplate="x %{x:.1f} m, y %{y:.1f} m<br>%{z} shots<extra></extra>",
+        )
+    )
+    for x0, y0, x1, y1 in COURT_LINES:
+        fig.add_shape(
+            type="line", x0=x0, y0=y0, x1=x1, y1=y1, line=dict(color="gray", width=1)
+        )
+    fig.add_shape(
+        type="line",
+        x0=X_EDGES[0],
+        y0=NET_Y,
+        x1=X_EDGES[-1],
+        y1=NET_Y,
+        line=dict(color="black", width=2),
+    )
+    fig.update_layout(title=title, height=650)
+    fig.update_xaxes(title="Across court (m)")
+    fig.update_yaxes(title="From my baseline (m)", scaleanchor="x")
+    return fig
+
+
+def _options(keys, heatmap, col):
+    values = keys.loc[keys["heatmap"] == heatmap, col].dropna().unique()
+    return sorted(values)
+
+
+def render_heatmap_section(version, matches, shots):
+    """Heatmap explorer: pick a heatmap, a player, matches and filters"""
+    st.subheader("🗺️ Shot Heatmaps")
+
+    keys, cells = get_heatmap_grids(version, shots)
+    if keys.empty:
+        st.info("No shot coordinates to draw heatmaps from.")
+        return
+
+    col1, col2 = st.columns(2)
+    with col1:
+        heatmap = st.selectbox("Heatmap", list(HEATMAPS), key="heatmap_kind")
+    with col2:
+        whose = st.radio(
+            "Shots by", ["Me", "Opponent"], horizontal=True, key="heatmap_whose"
+        )
+
+    names = matches["match_date"].astype(str) + " vs " + matches["guest_team"]
+    labels = dict(zip(matches["match_id"].astype(str), names.astype(str)))
+    match_ids = st.multiselect(
+        "Matches (all when empty)",
+        list(labels),
+        format_func=labels.get,
+        key="heatmap_matches",
+    )
+
+    col1, col2, col3 = st.columns(3)
+    with col1:
+        strokes = st.multiselect(
+            "Stroke", _options(keys, heatmap, "stroke"), key="heatmap_strokes"
+        )
+    with col2:
+        types = st.multiselect(
+            "Type", _options(keys, heatmap, "type"), key="heatmap_types"
+        )
+    with col3:
+        results = st.multiselect(
+            "Result", _options(keys, heatmap, "result"), key="heatmap_results"
+        )
+
+    grid = sum_grids(
+        keys,
+        cells,
+        heatmap,
+        mine=whose == "Me",
+        match_ids=match_ids,
+        strokes=strokes,
+        types=types,
+        results=results,
+    )
+    if not grid.any():
+        st.info("No shots match this selection.")
+        return
+    st.plotly_chart(
+        create_heatmap_figure(grid, f"{heatmap} ({int(grid.sum())} shots)"),
+        width="stretch",
+        theme="streamlit",
+    )
@@ -3,159 +3,63 @@ Match Metrics module for SwingVision analytics
 Contains functions for analyzing match-level performance metrics
 """
 
+import numpy as np
 import streamlit as st
 import pandas as pd
 import plotly.graph_objects as go
 from plotly.subplots import make_subplots
 
-from .data_processing import resolve_match_won, completed_matches
-
-HOST = "Joao Cassis"
-
-
-@st.cache_data
-def calculate_match_analytics(matches, points, shots):
-    """Calculate analytical metrics for performance insights"""
-
-    analytics_data = []
-
-    for _, match in matches.iterrows():
-        match_id = match["match_id"]
-        match_points = points[points["match_id"] == match_id]
-        match_shots = shots[shots["match_id"] == match_id]
-        my_shots = match_shots[match_shots["player"] == HOST]
-
-        if len(match_points) == 0:
-            continue
-
-        # Basic match outcome (prefer official Sets; None if unfinished)
-        total_points = len(match_points)
-        points_won = len(match_points[match_points["point_winner"] == HOST])
-        points_won_pct = points_won / total_points
-        match_won = resolve_match_won(match, points_won_pct)
-
-        # === NET POINTS CALCULATION ===
-        # Positive shots (points I create)
-        my_winner_points = match_points[match_points["point_winner"] == HOST]
-        my_forehand_winners = len(
-            my_winner_points[my_winner_points["detail"] == "Forehand Winner"]
-        )
-        my_backhand_winners = len(
-            my_winner_points[my_winner_points["detail"] == "Backhand Winner"]
-        )
-        my_winners = my_forehand_winners + my_backhand_winners
-
-        # Opponent errors that gave me points
-        opponent_unforced_errors = len(
-            my_winner_points[
-                my_winner_points["detail"].isin(
-                    [
-                        "Forehand Unforced Error",
-                        "Backhand Unforced Error",
-                        "Double Fault",
-                    ]
-                )
-            ]
-        )
-
-        positive_shots = my_winners + opponent_unforced_errors
-
-        # Negative shots (points I give away)
-        opponent_winner_points = match_points[match_points["point_winner"] != HOST]
-        my_unforced_errors = len(
-            opponent_winner_points[
-                opponent_winner_points["detail"].isin(
-                    ["Forehand Unforced Error", "Backhand Unforced Error"]
-                )
-            ]
-        )
-        my_double_faults = len(
-            opponent_winner_points[opponent_winner_points["detail"] == "Double Fault"]
-        )
-
-        negative_shots = my_unforced_errors + my_double_faults
-
-        # NET POINTS = Positive - Negative
-        net_points = positive_shots - negative_shots
-
-        # === OTHER ANALYTICAL METRICS ===
-        # Winner/Error Ratio
-        winner_error_ratio = (
-            my_winners / my_unforced_errors
-            if my_unforced_errors > 0
-            else (999 if my_winners > 0 else 0)
-        )
-
-        # Service Winners (including aces)
-        my_aces = len(my_winner_points[my_winner_points["detail"] == "Ace"])
-        my_service_winners = len(
-            my_winner_points[my_winner_points["detail"] == "Service Winner"]
-        )
-        total_service_winners = my_aces + my_service_winners
-
-        # Break Point Conversion
-        break_point_opportunities = len(
-            match_points[
-                (match_points["match_server"] != HOST) & (match_points["break_point"])
-            ]
-        )
-        break_points_won = len(
-            match_points[
-                (match_points["match_server"] != HOST)
-                & (match_points["break_point"])
-                & (match_points["point_winner"] == HOST)
-            ]
-        )
-        break_point_conversion = (
-            break_points_won / break_point_opportunities
-            if break_point_opportunities > 0
-            else 0
-        )
-
-        # Return Points Won
-        return_points = match_points[match_points["match_server"] != HOST]
-        return_points_won = len(return_points[return_points["point_winner"] == HOST])
-        return_points_won_pct = (
-            return_points_won / len(return_points) if len(return_points) > 0 else 0
-        )
-
-        # First Serve Percentage
-        serve_points = match_points[match_points["match_server"] == HOST]
-        my_first_serves = my_shots[my_shots["type"] == "first_serve"]
-        first_serves_in = len(my_first_serves[my_first_serves["result"] == "In"])
-        first_serve_pct = (
-            first_serves_in / len(serve_points) if len(serve_points) > 0 else 0
-        )
-
-        analytics_data.append(
-            {
-                "match_id": match_id,
-                "match_date": match["match_date"],
-                "opponent": match["guest_team"],
-                "location": match["location"],
-                "match_won": match_won,
-                "match_status": match.get("match_status", "completed"),
-                "is_completed": bool(match.get("is_completed", True)),
-                "scoreline": match.get("scoreline", ""),
-                "points_won_pct": points_won_pct,
-                # Net Points breakdown
-                "net_points": net_points,
-                "positive_shots": positive_shots,
-                "negative_shots": negative_shots,
-                "my_winners": my_winners,
-                "opponent_errors": opponent_unforced_errors,
-                "my_unforced_errors": my_unforced_errors,
-                "my_double_faults": my_double_faults,
-                # Other analytical metrics
-                "winner_error_ratio": winner_error_ratio,
-                "service_winners": total_service_winners,
-                "break_point_conversion": break_point_conversion,
-                "return_points_won_pct": return_points_won_pct,
-                "first_serve_pct": first_serve_pct,
-            }
-        )
+from .data_processing import completed_matches
+
+
+MATCH_COLUMNS = [
+    "match_id",
+    "match_date",
+    "opponent",
+    "location",
+    "match_won",
+    "match_status",
+    "is_completed",
+    "scoreline",
+]
+
+# Analytics columns and the per-match metric (metrics.MATCH_METRICS) each reads
+ANALYTICS_METRICS = {
+    "points_won_pct": "points_won_pct",
+    # Net Points breakdown
+    "net_points": "net_points",
+    "positive_shots": "positive_shots",
+    "negative_shots": "negative_shots",
+    "my_winners": "winners",
+    "opponent_errors": "opponent_unforced_errors",
+    "my_unforced_errors": "unforced_errors",
+    "my_double_faults": "double_faults",
+    # Other analytical metrics
+    "winner_error_ratio": "winner_error_ratio",
+    "service_winners": "total_service_winners",
+    "break_point_conversion": "break_points_won_pct",
+    "return_points_won_pct": "return_points_won_pct",
+    "first_serve_pct": "first_serve_pct",
+}
+
+
+def calculate_match_analytics(match_metrics_df):
+    """
+    Calculate analytical metrics for performance insights: the analytics
+    projection of the per-match metrics, for matches with points
+    """
+    if match_metrics_df.empty:
+        return pd.DataFrame()
 
-    return pd.DataFrame(analytics_data)
+    df = match_metrics_df[match_metrics_df["total_points"] > 0]
+    analytics = df[MATCH_COLUMNS].assign(
+        **{name: df[metric] for name, metric in ANALYTICS_METRICS.items()}
+    )
+    # No errors: chart winners-only matches at 999 instead of infinity
+    analytics["winner_error_ratio"] = analytics["winner_error_ratio"].replace(
+        np.inf, 999
+    )
+    return analytics.reset_index(drop=True)
 
 
 def create_net_points_breakdown_chart(analytics_df):
@@ -310,12 +214,12 @@ def create_performance_comparison_dashboard(analytics_df):
     return fig
 
 
-def render_match_analysis_tab(matches, points, shots):
+def render_match_analysis_tab(matches, points, shots, match_metrics_df):
     """Main function for the Match Analysis tab"""
     st.header("📊 Match Analysis - Performance Insights")
 
     # Calculate analytics metrics
-    analytics_df = calculate_match_analytics(matches, points, shots)
+    analytics_df = calculate_match_analytics(match_metrics_df)
 
     if analytics_df.empty:
         st.warning("No data available for analysis.")
@@ -0,0 +1,402 @@
+"""
+Metrics module for SwingVision analytics
+Registry of per-match metrics: every metric is one declared formula, and all
+of them are computed for every match in one vectorized pass
+"""
+
+import pandas as pd
+
+from .rallies import HOST, POINT_KEYS
+
+INTEGER = "INTEGER"
+DOUBLE = "DOUBLE PRECISION"
+
+# Bump when the formula of a stored metric changes: stored rows of an older
+# version are recomputed on load until rebuilt in Maintenance
+MATCH_METRICS_VERSION = 1
+
+UNFORCED_ERRORS = ["Forehand Unforced Error", "Backhand Unforced Error"]
+
+
+def _count_per_match(mask, match_ids, index):
+    """Number of True rows in `mask` per match, aligned to `index`."""
+    return mask.astype("int64").groupby(match_ids).sum().reindex(index, fill_value=0)
+
+
+def _ratio(num, den):
+    """num / den where den > 0, else 0."""
+    return (num / den.where(den > 0)).fillna(0)
+
+
+def _winner_error_ratio(winners, errors):
+    ratio = winners / errors.where(errors > 0)
+    return ratio.where(errors > 0, (winners > 0).map({True: float("inf"), False: 0}))
+
+
+def _serve_return_won(points_side, my_shots, index):
+    """
+    Join the given points to my shots on the point key and count, per match,
+    the joined rows (attempts) and those I won. Duplicate shot rows count
+    once each, like the per-match inner merge did.
+    """
+    joined = points_side[POINT_KEYS + ["won"]].merge(
+        my_shots[POINT_KEYS], on=POINT_KEYS, how="inner"
+    )
+    attempts = _count_per_match(
+        pd.Series(True, index=joined.index), joined["match_id"], index
+    )
+    won = _count_per_match(joined["won"], joined["match_id"], index)
+    return attempts, won
+
+
+def _games_won(points_side, index):
+    """Games (set, game) per match and how many ended with my point."""
+    last = points_side.groupby(["match_id", "set", "game"])["point_winner"].last()
+    match_ids = last.index.get_level_values("match_id")
+    total = _count_per_match(pd.Series(True, index=last.index), match_ids, index)
+    won = _count_per_match(last == HOST, match_ids, index)
+    return total, won
+
+
+class MetricContext:
+    """
+    Point and shot masks the formulas share, built once per pass. Counting
+    helpers return one value per match in `index`.
+    """
+
+    def __init__(self, matches, points, shots):
+        self.index = pd.Index(matches["match_id"])
+        self.points = points
+        self.all_points = pd.Series(True, index=points.index)
+        self.won = points["point_winner"] == HOST
+        self.serving = points["match_server"] == HOST
+        self.returning = ~self.serving
+        self.detail = points["detail"]
+        self.break_point = points["break_point"].astype(bool)
+        self.blank = points["detail_blank"].astype(bool)
+        self.my_shots = shots[shots["player"] == HOST]
+        self.shot_in = self.my_shots["result"] == "In"
+        scored = points.assign(won=self.won)
+        self.sides = {"serve": scored[self.serving], "return": scored[self.returning]}
+        self.serve_total = self.count(self.serving)
+        self.return_total = self.count(self.returning)
+        self._joined = {}
+        self._games = {}
+
+    def count(self, mask):
+        """Points in `mask` per match."""
+        return _count_per_match(mask, self.points["match_id"], self.index)
+
+    def is_detail(self, *details):
+        return self.detail.isin(details)
+
+    def my_shots_of(self, shot_type, in_only=False):
+        mask = self.my_shots["type"] == shot_type
+        return mask & self.shot_in if in_only else mask
+
+    def shot_count(self, mask):
+        """My shots in `mask` per match."""
+        return _count_per_match(mask, self.my_shots["match_id"], self.index)
+
+    def speed_mean(self, mask, gate):
+        """Mean speed of my shots in `mask`, 0 without any or when gate is 0."""
+        sid = self.my_shots["match_id"]
+        speeds = self.my_shots.loc[mask, "speed"].groupby(sid[mask]).mean()
+        speeds = speeds.reindex(self.index)
+        return speeds.where((self.shot_count(mask) > 0) & (gate > 0), 0)
+
+    def joined(self, side, shot_type, in_only=False):
+        """(attempts, won) of my `side` points joined to my shots of a type."""
+        key = (side, shot_type, in_only)
+        if key not in self._joined:
+            self._joined[key] = _serve_return_won(
+                self.sides[side],
+                self.my_shots[self.my_shots_of(shot_type, in_only)],
+                self.index,
+            )
+        return self._joined[key]
+
+    def games(self, side):
+        """(games, games won) of my `side` games."""
+        if side not in self._games:
+            self._games[side] = _games_won(self.sides[side], self.index)
+        return self._games[side]
+
+
+class Metric:
+    """
+    One per-match metric: column name, SQL type and formula(ctx, m), where
+    `ctx` is the MetricContext and `m` the metrics declared before it.
+    Stored metrics go to swingvision_match_metrics; derived ones must only
+    read `m`, so they can be recomputed from stored rows.
+    """
+
+    def __init__(self, name, sql_type, formula, stored=True):
+        self.name = name
+        self.sql_type = sql_type
+        self.formula = formula
+        self.stored = stored
+
+
+MATCH_METRICS = [
+    # === POINTS ===
+    Metric("total_points", INTEGER, lambda c, m: c.count(c.all_points)),
+    Metric("points_won", INTEGER, lambda c, m: c.count(c.won)),
+    Metric(
+        "points_won_pct",
+        DOUBLE,
+        lambda c, m: _ratio(m["points_won"], m["total_points"]),
+    ),
+    # === SERVE METRICS USING DETAIL COLUMN ===
+    Metric(
+        "first_serve_pct",
+        DOUBLE,
+        lambda c, m: _ratio(
+            c.shot_count(c.my_shots_of("first_serve", in_only=True)),
+            c.serve_total,
+        ),
+    ),
+    Metric(
+        "first_serve_won_pct",
+        DOUBLE,
+        lambda c, m: _ratio(
+            c.joined("serve", "first_serve", in_only=True)[1],
+            c.shot_count(c.my_shots_of("first_serve", in_only=True)),
+        ).where(c.serve_total > 0, 0),
+    ),
+    Metric(
+        "first_serve_speed",
+        DOUBLE,
+        lambda c, m: c.speed_mean(c.my_shots_of("first_serve"), c.serve_total),
+    ),
+    Metric(
+        "second_serve_pct",
+        DOUBLE,
+        lambda c, m: _ratio(
+            c.shot_count(c.my_shots_of("second_serve", in_only=True)),
+            c.shot_count(c.my_shots_of("second_serve")),
+        ).where(c.serve_total > 0, 0),
+    ),
+    Metric(
+        "second_serve_won_pct",
+        DOUBLE,
+        lambda c, m: _ratio(
+            c.joined("serve", "second_serve", in_only=True)[1],
+            c.shot_count(c.my_shots_of("second_serve", in_only=True)),
+        ).where(c.serve_total > 0, 0),
+    ),
+    Metric(
+        "second_serve_speed",
+        DOUBLE,
+        lambda c, m: c.speed_mean(c.my_shots_of("second_serve"), c.serve_total),
+    ),
+    Metric(
+        "double_faults",
+        INTEGER,
+        lambda c, m: c.count(c.serving & ~c.won & c.is_detail("Double Fault")),
+    ),
+    Metric(
+        "aces",
+        INTEGER,
+        lambda c, m: c.count(c.serving & c.won & c.is_detail("Ace")),
+    ),
+    Metric(
+        "service_winners",
+        INTEGER,
+        lambda c, m: c.count(c.serving & c.won & c.is_detail("Service Winner")),
+    ),
+    Metric(
+        "service_games_won_pct",
+        DOUBLE,
+        lambda c, m: _ratio(c.games("serve")[1], c.games("serve")[0]),
+    ),
+    # === RETURN METRICS ===
+    Metric(
+        "first_return_won_pct",
+        DOUBLE,
+        lambda c, m: _ratio(
+            c.joined("return", "first_return")[1],
+            c.joined("return", "first_return")[0],
+        ).where(c.return_total > 0, 0),
+    ),
+    Metric(
+        "first_return_speed",
+        DOUBLE,
+        lambda c, m: c.speed_mean(c.my_shots_of("first_return"), c.return_total),
+    ),
+    Metric(
+        "second_return_won_pct",
+        DOUBLE,
+        lambda c, m: _ratio(
+            c.joined("return", "second_return")[1],
+            c.joined("return", "second_return")[0],
+        ).where(c.return_total > 0, 0),
+    ),
+    Metric(
+        "second_return_speed",
+        DOUBLE,
+        lambda c, m: c.speed_mean(c.my_shots_of("second_return"), c.return_total),
+    ),
+    Metric(
+        "return_points_won_pct",
+        DOUBLE,
+        lambda c, m: _ratio(c.count(c.returning & c.won), c.return_total),
+    ),
+    Metric(
+        "return_games_won_pct",
+        DOUBLE,
+        lambda c, m: _ratio(c.games("return")[1], c.games("return")[0]),
+    ),
+    # === WINNERS AND ERRORS FROM DETAIL COLUMN ===
+    Metric(
+        "winners",
+        INTEGER,
+        lambda c, m: c.count(c.won & c.is_detail("Forehand Winner", "Backhand Winner")),
+    ),
+    Metric(
+        "forehand_winners",
+        INTEGER,
+        lambda c, m: c.count(c.won & c.is_detail("Forehand Winner")),
+    ),
+    Metric(
+        "backhand_winners",
+        INTEGER,
+        lambda c, m: c.count(c.won & c.is_detail("Backhand Winner")),
+    ),
+    Metric(
+        "unforced_errors",
+        INTEGER,
+        lambda c, m: c.count(~c.won & c.is_detail(*UNFORCED_ERRORS)),
+    ),
+    Metric(
+        "forehand_errors",
+        INTEGER,
+        lambda c, m: c.count(~c.won & c.is_detail("Forehand Unforced Error")),
+    ),
+    Metric(
+        "backhand_errors",
+        INTEGER,
+        lambda c, m: c.count(~c.won & c.is_detail("Backhand Unforced Error")),
+    ),
+    Metric("blank_detail_total", INTEGER, lambda c, m: c.count(c.blank)),
+    Metric("blank_detail_lost", INTEGER, lambda c, m: c.count(~c.won & c.blank)),
+    Metric("blank_detail_won", INTEGER, lambda c, m: c.count(c.won & c.blank)),
+    Metric(
+        "opponent_unforced_errors",
+        INTEGER,
+        lambda c, m: c.count(c.won & c.is_detail(*UNFORCED_ERRORS, "Double Fault")),
+    ),
+    Metric(
+        "opponent_forehand_errors",
+        INTEGER,
+        lambda c, m: c.count(c.won & c.is_detail("Forehand Unforced Error")),
+    ),
+    Metric(
+        "opponent_backhand_errors",
+        INTEGER,
+        lambda c, m: c.count(c.won & c.is_detail("Backhand Unforced Error")),
+    ),
+    Metric(
+        "opponent_double_faults",
+        INTEGER,
+        lambda c, m: c.count(c.won & c.is_detail("Double Fault")),
+    ),
+    Metric(
+        "winner_error_ratio",
+        DOUBLE,
+        lambda c, m: _winner_error_ratio(m["winners"], m["unforced_errors"]),
+    ),
+    Metric(
+        "forehand_winner_error_ratio",
+        DOUBLE,
+        lambda c, m: _winner_error_ratio(m["forehand_winners"], m["forehand_errors"]),
+    ),
+    Metric(
+        "backhand_winner_error_ratio",
+        DOUBLE,
+        lambda c, m: _winner_error_ratio(m["backhand_winners"], m["backhand_errors"]),
+    ),
+    # === BREAK POINTS ===
+    Metric(
+        "break_points_won_pct",
+        DOUBLE,
+        lambda c, m: _ratio(
+            c.count(c.returning & c.break_point & c.won),
+            c.count(c.returning & c.break_point),
+        ),
+    ),
+    Metric(
+        "break_points_saved_pct",
+        DOUBLE,
+        lambda c, m: _ratio(
+            c.count(c.serving & c.break_point & c.won),
+            c.count(c.serving & c.break_point),
+        ),
+    ),
+    # === NET POINTS (derived) ===
+    # Positive shots (points I create) minus negative shots (points I give away)
+    Metric(
+        "positive_shots",
+        INTEGER,
+        lambda c, m: m["winners"] + m["opponent_unforced_errors"],
+        stored=False,
+    ),
+    Metric(
+        "negative_shots",
+        INTEGER,
+        lambda c, m: m["unforced_errors"] + m["double_faults"],
+        stored=False,
+    ),
+    Metric(
+        "net_points",
+        INTEGER,
+        lambda c, m: m["positive_shots"] - m["negative_shots"],
+        stored=False,
+    ),
+    # Service winners including aces
+    Metric(
+        "total_service_winners",
+        INTEGER,
+        lambda c, m: m["aces"] + m["service_winners"],
+        stored=False,
+    ),
+]
+
+# Layout of swingvision_match_metrics (schema.ensure_schema)
+MATCH_METRIC_COLUMNS = {
+    metric.name: metric.sql_type for metric in MATCH_METRICS if metric.stored
+}
+METRIC_DTYPES = {
+    metric.name: "int64" if metric.sql_type == INTEGER else "float64"
+    for metric in MATCH_METRICS
+}
+
+
+def compute_metrics(matches, points, shots) -> pd.DataFrame:
+    """
+    match_id plus every stored metric of each match in `matches`, in one
+    pass over all points and shots. Each match's values only depend on its
+    own points and shots.
+    """
+    ctx = MetricContext(matches, points, shots)
+    m = {}
+    for metric in MATCH_METRICS:
+        if metric.stored:
+            m[metric.name] = metric.formula(ctx, m)
+    return pd.DataFrame(
+        {
+            "match_id": matches["match_id"].to_numpy(),
+            **{name: values.to_numpy() for name, values in m.items()},
+        }
+    )
+
+
+def derive_metrics(values: pd.DataFrame) -> pd.DataFrame:
+    """`values` (stored metrics) plus the derived metrics, in registry order."""
+    m = {col: values[col] for col in MATCH_METRIC_COLUMNS}
+    for metric in MATCH_METRICS:
+        if not metric.stored:
+            m[metric.name] = metric.formula(None, m)
+    return pd.DataFrame(
+        {metric.name: m[metric.name] for metric in MATCH_METRICS}, index=values.index
+    )
@@ -0,0 +1,128 @@
+"""
+Patterns module for SwingVision analytics
+N-gram index over my per-point shot sequences, so pattern questions ("how
+often do I win after serve wide → FH inside out?") are lookups, not scans
+"""
+
+import numpy as np
+import pandas as pd
+import streamlit as st
+
+from .rallies import (
+    HOST,
+    PLUS_ONE,
+    POINT_KEYS,
+    RETURN_TYPES,
+    SERVE_TYPES,
+    clean_rally_shots,
+)
+
+# Longest pattern the index answers directly
+MAX_PATTERN = 4
+
+STROKE_NAMES = {"Forehand": "FH", "Backhand": "BH"}
+
+
+def shot_tokens(shots: pd.DataFrame) -> pd.Series:
+    """
+    One vocabulary token per shot: the shot's role from SERVE_TYPES,
+    RETURN_TYPES or PLUS_ONE, its stroke and its direction, e.g.
+    "Serve wide", "Return BH cross court", "+1 FH inside out".
+    """
+    stroke = shots["stroke"].astype(object)
+    stroke = stroke.map(STROKE_NAMES).fillna(stroke).fillna("Shot").to_numpy()
+    shot_type = shots["type"].astype(object)
+    role = np.select(
+        [
+            shot_type.isin(SERVE_TYPES).to_numpy(),
+            shot_type.isin(RETURN_TYPES).to_numpy(),
+            shot_type.isin(PLUS_ONE).to_numpy(),
+        ],
+        ["Serve", "Return " + stroke, "+1 " + stroke],
+        default=stroke,
+    )
+    direction = shots["direction"].astype(object)
+    known = (direction.notna() & (direction != "---")).to_numpy()
+    return pd.Series(
+        np.where(known, role + " " + direction.fillna("").astype(str), role),
+        index=shots.index,
+    )
+
+
+class PatternIndex:
+    """
+    Map from every contiguous run of up to MAX_PATTERN tokens in my shot
+    sequence of a point to the sorted point_keys it occurs in. `opening`
+    holds only the runs that start the point. Both double as a trie:
+    `children` lists the tokens seen after each run.
+    """
+
+    def __init__(self, sequences: pd.Series, won: pd.Series):
+        anywhere, opening, children = {}, {}, {}
+        for point_key, tokens in sequences.items():
+            for start in range(len(tokens)):
+                stop = min(start + MAX_PATTERN, len(tokens))
+                for end in range(start + 1, stop + 1):
+                    gram = tuple(tokens[start:end])
+                    anywhere.setdefault(gram, set()).add(point_key)
+                    if start == 0:
+                        opening.setdefault(gram, set()).add(point_key)
+                    children.setdefault(gram[:-1], set()).add(gram[-1])
+        self.anywhere = _freeze_postings(anywhere)
+        self.opening = _freeze_postings(opening)
+        self.children = {prefix: sorted(nxt) for prefix, nxt in children.items()}
+        self.won = won
+
+    def point_keys(self, pattern, opening=False, within=None) -> np.ndarray:
+        """point_keys whose sequence contains `pattern` (starts with it if opening)."""
+        postings = (self.opening if opening else self.anywhere).get(tuple(pattern))
+        if postings is None:
+            return np.empty(0, dtype=np.int64)
+        if within is not None:
+            postings = postings[np.isin(postings, within)]
+        return postings
+
+    def stats(self, pattern, opening=False, within=None) -> dict:
+        keys = self.point_keys(pattern, opening, within)
+        won = int(self.won.reindex(keys).eq(True).sum())
+        return {
+            "points": len(keys),
+            "won": won,
+            "won_pct": won / len(keys) if len(keys) else None,
+        }
+
+    def continuations(self, pattern, opening=False, within=None) -> pd.DataFrame:
+        """Win rate of `pattern` extended by each token seen after it."""
+        pattern = tuple(pattern)
+        if len(pattern) >= MAX_PATTERN:
+            return pd.DataFrame()
+        rows = []
+        for token in self.children.get(pattern, []):
+            stats = self.stats(pattern + (token,), opening, within)
+            if stats["points"]:
+                rows.append({"next": token, **stats})
+        if not rows:
+            return pd.DataFrame()
+        return pd.DataFrame(rows).sort_values(
+            ["points", "won_pct"], ascending=[False, False]
+        )
+
+
+def _freeze_postings(postings: dict) -> dict:
+    return {
+        gram: np.array(sorted(keys), dtype=np.int64) for gram, keys in postings.items()
+    }
+
+
+def build_pattern_index(shots: pd.DataFrame, facts: pd.DataFrame) -> PatternIndex:
+    """PatternIndex over my clean rally shots of every point in `facts`."""
+    clean = clean_rally_shots(shots).dropna(subset=POINT_KEYS)
+    mine = clean[(clean["player"] == HOST) & clean["point_key"].isin(facts.index)]
+    sequences = shot_tokens(mine).groupby(mine["point_key"], sort=False).agg(list)
+    return PatternIndex(sequences, facts["won"])
+
+
+@st.cache_resource(max_entries=2)
+def get_pattern_index(version, _shots, _facts) -> PatternIndex:
+    """build_pattern_index for dataset `version`, shared: do not modify."""
+    return build_pattern_index(_shots, _facts)
@@ -0,0 +1,50 @@
+"""
+Prefetch module for SwingVision analytics
+Warms the cached analytics of views that are not on screen, in a background
+thread, so switching views later is a cache hit
+"""
+
+import threading
+
+import streamlit as st
+
+
+class _PrefetchState:
+    """At most one warm-up thread per process."""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.thread = None
+
+
+@st.cache_resource
+def _prefetch_state() -> _PrefetchState:
+    return _PrefetchState()
+
+
+def _run(warmers, args):
+    for warm in warmers:
+        try:
+            warm(*args)
+        except Exception as e:
+            print(f"Prefetch failed in {warm.__module__}.{warm.__name__}: {e}")
+
+
+def start_prefetch(warmers, *args) -> bool:
+    """
+    Call each of `warmers` with `args` in a daemon thread. Warmers only call
+    st.cache_data functions, so their results land in the shared cache; they
+    must not draw anything. Returns False when a warm-up is already running.
+    """
+    state = _prefetch_state()
+    with state.lock:
+        if state.thread is not None and state.thread.is_alive():
+            return False
+        state.thread = threading.Thread(
+            target=_run,
+            args=(list(warmers), args),
+            name="swingvision-prefetch",
+            daemon=True,
+        )
+        state.thread.start()
+    return True
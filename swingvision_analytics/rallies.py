@@ -0,0 +1,68 @@
+"""
+Rallies module for SwingVision analytics
+Per-point rally cleaning and rally features, computed once when a match is
+uploaded and stored in swingvision_rallies
+"""
+
+import pandas as pd
+
+HOST = "Joao Cassis"
+
+POINT_KEYS = ["match_id", "set", "game", "point"]
+
+SERVE_TYPES = {"first_serve", "second_serve"}
+RETURN_TYPES = {"first_return", "second_return"}
+PLUS_ONE = {"serve_plus_one", "return_plus_one"}
+RALLY_STROKES = ["Forehand", "Backhand", "Volley", "Overhead"]
+
+RALLY_COLUMNS = ["clean_shots", "rally_length", "rally_strokes", "my_rally_strokes"]
+
+
+def clean_rally_shots(shots: pd.DataFrame) -> pd.DataFrame:
+    """
+    Chronological unique strokes of every point, for sequence work: feeds
+    dropped, Type==none kept only for real groundstrokes/volleys, and repeated
+    (video_time, player, type, result) events within a point dropped.
+    """
+    df = shots.sort_values(POINT_KEYS + ["shot", "video_time"], kind="stable")
+    df = df[df["stroke"] != "Feed"]
+    mask = df["type"].isin(SERVE_TYPES | RETURN_TYPES | PLUS_ONE | {"in_play"}) | (
+        (df["type"] == "none") & df["stroke"].isin(RALLY_STROKES)
+    )
+    df = df[mask]
+    return df.drop_duplicates(
+        subset=POINT_KEYS + ["video_time", "player", "type", "result"]
+    )
+
+
+def build_rally_table(shots: pd.DataFrame) -> pd.DataFrame:
+    """
+    One row per point that has shots:
+    - clean_shots: rows left after clean_rally_shots
+    - rally_length: clean strokes other than serves
+    - rally_strokes: all shot rows other than feeds and serves
+    - my_rally_strokes: the rally_strokes hit by HOST
+    """
+    if shots.empty:
+        return shots[POINT_KEYS].assign(**{col: 0 for col in RALLY_COLUMNS})
+
+    in_rally = ~shots["stroke"].isin(["Feed", "Serve"])
+    table = (
+        shots[POINT_KEYS]
+        .assign(
+            rally_strokes=in_rally,
+            my_rally_strokes=in_rally & (shots["player"] == HOST),
+        )
+        .groupby(POINT_KEYS)
+        .sum()
+    )
+
+    clean = clean_rally_shots(shots)
+    clean_counts = (
+        clean[POINT_KEYS]
+        .assign(clean_shots=1, rally_length=~clean["stroke"].isin(["Feed", "Serve"]))
+        .groupby(POINT_KEYS)
+        .sum()
+    )
+    table = table.join(clean_counts, how="left").fillna(0).astype(int)
+    return table.reset_index()[POINT_KEYS + RALLY_COLUMNS]
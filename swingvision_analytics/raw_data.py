@@ -6,6 +6,16 @@ Contains functions for displaying raw data tables
 import streamlit as st
 
 
+def _memory_caption(df):
+    report = df.attrs.get("memory_report")
+    if not report:
+        return
+    st.caption(
+        f"In memory: {report['after'] / 1e6:.1f} MB "
+        f"({report['before'] / 1e6:.1f} MB before dtype compaction)"
+    )
+
+
 def render_raw_data_tab(matches, points, shots, sets=None):
     """Render the raw data tab"""
     st.header("📋 Raw Data")
@@ -19,8 +29,10 @@ def render_raw_data_tab(matches, points, shots, sets=None):
     if data_type == "Matches":
         st.dataframe(matches, width="stretch")
     elif data_type == "Points":
+        _memory_caption(points)
         st.dataframe(points, width="stretch")
     elif data_type == "Sets":
         st.dataframe(sets, width="stretch")
     else:
+        _memory_caption(shots)
         st.dataframe(shots, width="stretch")
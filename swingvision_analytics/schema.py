@@ -5,6 +5,8 @@ Ensure SwingVision Postgres tables/columns exist before upload.
 from sqlalchemy import text
 from db import engine
 
+from .metrics import MATCH_METRIC_COLUMNS
+
 
 MATCH_COLUMNS = {
     "end_time": "TIMESTAMP",
@@ -15,9 +17,17 @@ MATCH_COLUMNS = {
     "match_status": "TEXT",
 }
 
+# Perspective-normalized coordinates (court.normalized_coordinates)
+SHOT_COLUMNS = {
+    "hit_x_n": "DOUBLE PRECISION",
+    "hit_y_n": "DOUBLE PRECISION",
+    "bounce_x_n": "DOUBLE PRECISION",
+    "bounce_y_n": "DOUBLE PRECISION",
+}
+
 
 def ensure_schema():
-    """Create missing tables and add new match columns if needed."""
+    """Create missing tables and add new match/shot columns if needed."""
     with engine.begin() as conn:
         conn.execute(
             text(
@@ -121,8 +131,102 @@ def ensure_schema():
                     result TEXT,
                     favorited TEXT,
                     start_time TEXT,
-                    video_time DOUBLE PRECISION
+                    video_time DOUBLE PRECISION,
+                    hit_x_n DOUBLE PRECISION,
+                    hit_y_n DOUBLE PRECISION,
+                    bounce_x_n DOUBLE PRECISION,
+                    bounce_y_n DOUBLE PRECISION
+                )
+                """
+            )
+        )
+        for col, col_type in SHOT_COLUMNS.items():
+            conn.execute(
+                text(
+                    f"ALTER TABLE swingvision_shots "
+                    f"ADD COLUMN IF NOT EXISTS {col} {col_type}"
+                )
+            )
+
+        conn.execute(
+            text(
+                """
+                CREATE TABLE IF NOT EXISTS swingvision_rallies (
+                    match_id UUID,
+                    set INTEGER,
+                    game INTEGER,
+                    point INTEGER,
+                    clean_shots INTEGER,
+                    rally_length INTEGER,
+                    rally_strokes INTEGER,
+                    my_rally_strokes INTEGER
+                )
+                """
+            )
+        )
+
+        conn.execute(
+            text(
+                """
+                CREATE TABLE IF NOT EXISTS swingvision_match_metrics (
+                    match_id UUID PRIMARY KEY,
+                    metrics_version INTEGER NOT NULL
                 )
                 """
             )
         )
+        for col, col_type in MATCH_METRIC_COLUMNS.items():
+            conn.execute(
+                text(
+                    f"ALTER TABLE swingvision_match_metrics "
+                    f"ADD COLUMN IF NOT EXISTS {col} {col_type}"
+                )
+            )
+
+
+# In-memory dtype profile for the processed frames (data_processing.compact_dtypes).
+# Low-cardinality text -> category, keys -> small ints, court coordinates -> float32.
+POINT_DTYPES = {
+    "set": "int16",
+    "game": "int16",
+    "point": "int16",
+    "serve_state": "category",
+    "match_server": "category",
+    "point_winner": "category",
+    "host_game_score": "category",
+    "guest_game_score": "category",
+    "detail": "category",
+    "clean_shots": "int16",
+    "rally_length": "int16",
+    "rally_strokes": "int16",
+    "my_rally_strokes": "int16",
+    "game_type": "category",
+}
+
+SHOT_DTYPES = {
+    "set": "int16",
+    "game": "int16",
+    "point": "int16",
+    "shot": "int16",
+    "player": "category",
+    "type": "category",
+    "stroke": "category",
+    "spin": "category",
+    "result": "category",
+    "direction": "category",
+    "bounce_depth": "category",
+    "bounce_zone": "category",
+    "bounce_side": "category",
+    "hit_depth": "category",
+    "hit_zone": "category",
+    "hit_side": "category",
+    "bounce_x": "float32",
+    "bounce_y": "float32",
+    "hit_x": "float32",
+    "hit_y": "float32",
+    "hit_z": "float32",
+    "hit_x_n": "float32",
+    "hit_y_n": "float32",
+    "bounce_x_n": "float32",
+    "bounce_y_n": "float32",
+}
@@ -6,25 +6,42 @@ Contains functions for analyzing shot patterns, strengths, and weaknesses
 import streamlit as st
 import pandas as pd
 
+from .court import DEFAULT_ZONE_GRID, ZONE_GRIDS, zone_labels
+from .data_processing import get_point_facts
+from .heatmaps import get_heatmap_grids, render_heatmap_section
+
 HOST = "Joao Cassis"
 
+POINT_KEYS = ["match_id", "set", "game", "point"]
+
+
+def _set_up_strokes(ordered: pd.DataFrame, finished) -> list:
+    """
+    Stroke of my last shot in every point whose last shot passes `finished`,
+    where "last" follows the row order of `ordered`. Listed in point order.
+    """
+    last = ordered.groupby(POINT_KEYS, sort=False).tail(1)
+    last = last[finished(last)]
+    mine = ordered[ordered["player"] == HOST].groupby(POINT_KEYS, sort=False).tail(1)
+    set_ups = last[POINT_KEYS].merge(mine[POINT_KEYS + ["stroke"]], on=POINT_KEYS)
+    return set_ups.sort_values(POINT_KEYS, kind="stable")["stroke"].tolist()
+
 
 @st.cache_data
-def get_bad_shots(shots):
-    my_shots = shots[(shots["player"] == HOST)]
-    total_by_stroke = my_shots.groupby("stroke").size().rename("total")
+def get_bad_shots(version, _shots):
+    my_shots = _shots[(_shots["player"] == HOST)]
+    total_by_stroke = my_shots.groupby("stroke", observed=True).size().rename("total")
     last_shots = my_shots.loc[
         my_shots.groupby(["match_id", "set", "game", "point"])["shot"].idxmax()
     ]
     your_errors = last_shots[last_shots["result"].isin(["Out", "Net"])]
-    error_by_stroke = your_errors.groupby("stroke").size().rename("error_count")
-    forced_winner = []
-    for _, grp in shots.groupby(["match_id", "set", "game", "point"]):
-        last = grp.sort_values("shot").iloc[-1]
-        if (last["player"] != HOST) and (last["result"] == "In"):
-            penult = grp[grp["player"] == HOST].sort_values("shot").iloc[-1:]
-            if not penult.empty:
-                forced_winner.append(penult.iloc[0]["stroke"])
+    error_by_stroke = (
+        your_errors.groupby("stroke", observed=True).size().rename("error_count")
+    )
+    forced_winner = _set_up_strokes(
+        _shots.sort_values(POINT_KEYS + ["shot"], kind="stable"),
+        lambda last: (last["player"] != HOST) & (last["result"] == "In"),
+    )
     opp_win_by_stroke = pd.Series(forced_winner).value_counts().rename("opp_win_count")
     bad_shots = pd.concat(
         [total_by_stroke, error_by_stroke, opp_win_by_stroke], axis=1
@@ -37,20 +54,20 @@ def get_bad_shots(shots):
 
 
 @st.cache_data
-def get_good_shots(shots):
-    my_shots = shots[(shots["player"] == HOST)]
-    total_by_stroke = my_shots.groupby("stroke").size().rename("total")
+def get_good_shots(version, _shots):
+    my_shots = _shots[(_shots["player"] == HOST)]
+    total_by_stroke = my_shots.groupby("stroke", observed=True).size().rename("total")
     last_shots = my_shots.loc[
         my_shots.groupby(["match_id", "set", "game", "point"])["shot"].idxmax()
     ]
     winners = last_shots[last_shots["result"] == "In"]
-    winner_by_stroke = winners.groupby("stroke").size().rename("win_count")
-    forced = []
-    for key, group in shots.groupby(["match_id", "set", "game", "point"]):
-        if group.iloc[-1]["player"] != HOST and group.iloc[-1]["result"] != "In":
-            penult = group.iloc[:-1].loc[group.iloc[:-1]["player"] == HOST]
-            if not penult.empty:
-                forced.append(penult.iloc[-1]["stroke"])
+    winner_by_stroke = (
+        winners.groupby("stroke", observed=True).size().rename("win_count")
+    )
+    forced = _set_up_strokes(
+        _shots,
+        lambda last: (last["player"] != HOST) & (last["result"] != "In"),
+    )
     error_by_stroke = pd.Series(forced).value_counts().rename("opp_error_count")
     good_shots = pd.concat(
         [total_by_stroke, winner_by_stroke, error_by_stroke], axis=1
@@ -62,295 +79,202 @@ def get_good_shots(shots):
     return good_shots
 
 
-@st.cache_data
-def analyze_error_factors(shots):
-    my_errs = shots[
-        (shots["player"] == HOST)
-        & (shots["stroke"].isin(["Forehand", "Backhand"]))
-        & (shots["result"].isin(["Out", "Net"]))
-    ]
+# Opponent shot attributes carried onto the shot that answers it
+PREV_SHOT_COLUMNS = [
+    "player",
+    "stroke",
+    "spin",
+    "speed",
+    "bounce_depth",
+    "bounce_x",
+    "bounce_y",
+]
+
+
+def with_previous_shot(shots: pd.DataFrame) -> pd.DataFrame:
+    """
+    `shots` with prev_* copies of PREV_SHOT_COLUMNS from the shot numbered
+    shot - 1 in the same point (its first row when numbers repeat), and
+    has_prev marking the shots that have one. One keyed self-merge.
+    """
+    keys = POINT_KEYS + ["shot"]
+    prev = shots.dropna(subset=keys).drop_duplicates(keys)[keys + PREV_SHOT_COLUMNS]
+    prev = prev.assign(shot=prev["shot"] + 1, has_prev=True).rename(
+        columns={col: f"prev_{col}" for col in PREV_SHOT_COLUMNS}
+    )
+    enriched = shots.merge(prev, on=keys, how="left")
+    enriched["has_prev"] = enriched["has_prev"].notna()
+    return enriched
 
-    rows = []
-    for (_, s, g, p), group in shots.groupby(["match_id", "set", "game", "point"]):
-        err = my_errs[
-            (my_errs["match_id"] == _)
-            & (my_errs["set"] == s)
-            & (my_errs["game"] == g)
-            & (my_errs["point"] == p)
-        ]
-        if err.empty:
-            continue
-        err_idx = err["shot"].iloc[0]
-        prior = group[group["shot"] == err_idx - 1]
-        if prior.empty or prior["player"].iloc[0] == HOST:
-            continue
-        prev = prior.iloc[0]
-        e = err.iloc[0]
-        rows.append(
-            {
-                "match_id": _,
-                "set": s,
-                "game": g,
-                "point": p,
-                "error_stroke": e["stroke"],
-                "error_result": e["result"],
-                "prev_stroke": prev["stroke"],
-                "prev_spin": prev["spin"],
-                "prev_speed": prev["speed"],
-                "prev_bounce_depth": prev["bounce_depth"],
-                "prev_bounce_x": prev["bounce_x"],
-                "prev_bounce_y": prev["bounce_y"],
-                "error_hit_zone": e["hit_zone"],
-                "error_hit_x": e["hit_x"],
-                "error_hit_y": e["hit_y"],
-                "error_hit_direction": e["direction"],
-            }
-        )
-    df = pd.DataFrame(rows)
-    if df.empty:
-        return pd.DataFrame()
 
-    error_summary = df.groupby("error_stroke").agg(
-        count=("prev_speed", "size"),
-        avg_prev_speed=("prev_speed", "mean"),
-        deep_pct=("prev_bounce_depth", lambda x: (x == "deep").mean()),
-        down_the_line=("error_hit_direction", lambda x: (x == "down the line").mean()),
-    )
-    return error_summary
+def _answers_opponent(rows: pd.DataFrame) -> pd.DataFrame:
+    return rows[rows["has_prev"] & (rows["prev_player"] != HOST)]
 
 
-@st.cache_data
-def analyze_success_factors(shots):
-    my_successes = shots[
-        (shots["player"] == HOST)
-        & (shots["stroke"].isin(["Forehand", "Backhand"]))
-        & (shots["result"] == "In")
+def _error_rows(context: pd.DataFrame) -> pd.DataFrame:
+    """My first groundstroke error of each point, when it answered the opponent."""
+    errors = context[
+        (context["player"] == HOST)
+        & (context["stroke"].isin(["Forehand", "Backhand"]))
+        & (context["result"].isin(["Out", "Net"]))
     ]
+    errors = errors.dropna(subset=POINT_KEYS).drop_duplicates(POINT_KEYS)
+    return _answers_opponent(errors)
 
-    rows = []
-    for (_, s, g, p), group in shots.groupby(["match_id", "set", "game", "point"]):
-        success = my_successes[
-            (my_successes["match_id"] == _)
-            & (my_successes["set"] == s)
-            & (my_successes["game"] == g)
-            & (my_successes["point"] == p)
-        ]
-        if success.empty:
-            continue
-
-        for _, succ in success.iterrows():
-            prior = group[group["shot"] == succ["shot"] - 1]
-            if prior.empty or prior["player"].iloc[0] == HOST:
-                continue
-            prev = prior.iloc[0]
-            rows.append(
-                {
-                    "match_id": _,
-                    "set": s,
-                    "game": g,
-                    "point": p,
-                    "success_stroke": succ["stroke"],
-                    "prev_stroke": prev["stroke"],
-                    "prev_spin": prev["spin"],
-                    "prev_speed": prev["speed"],
-                    "prev_bounce_depth": prev["bounce_depth"],
-                    "prev_bounce_x": prev["bounce_x"],
-                    "prev_bounce_y": prev["bounce_y"],
-                    "success_hit_zone": succ["hit_zone"],
-                    "success_hit_x": succ["hit_x"],
-                    "success_hit_y": succ["hit_y"],
-                    "success_hit_direction": succ["direction"],
-                }
-            )
 
-    df = pd.DataFrame(rows)
-    if df.empty:
+def _success_rows(context: pd.DataFrame) -> pd.DataFrame:
+    """Every groundstroke of mine that landed in, answering the opponent."""
+    successes = context[
+        (context["player"] == HOST)
+        & (context["stroke"].isin(["Forehand", "Backhand"]))
+        & (context["result"] == "In")
+    ]
+    return _answers_opponent(successes.dropna(subset=POINT_KEYS))
+
+
+def _previous_shot_summary(rows: pd.DataFrame, index_name: str) -> pd.DataFrame:
+    """Per stroke: how many, and what the opponent shot before it looked like."""
+    if rows.empty:
         return pd.DataFrame()
+    return (
+        rows.assign(
+            prev_deep=rows["prev_bounce_depth"] == "deep",
+            down_the_line=rows["direction"] == "down the line",
+        )
+        .groupby("stroke", observed=True)
+        .agg(
+            count=("prev_speed", "size"),
+            avg_prev_speed=("prev_speed", "mean"),
+            deep_pct=("prev_deep", "mean"),
+            down_the_line=("down_the_line", "mean"),
+        )
+        .rename_axis(index_name)
+    )
 
-    success_summary = df.groupby("success_stroke").agg(
-        count=("prev_speed", "size"),
-        avg_prev_speed=("prev_speed", "mean"),
-        deep_pct=("prev_bounce_depth", lambda x: (x == "deep").mean()),
-        down_the_line=(
-            "success_hit_direction",
-            lambda x: (x == "down the line").mean(),
-        ),
+
+@st.cache_data
+def analyze_error_factors(version, _shots):
+    return _previous_shot_summary(
+        _error_rows(with_previous_shot(_shots)), "error_stroke"
     )
-    return success_summary
 
 
 @st.cache_data
-def compare_error_vs_success_factors(shots):
+def analyze_success_factors(version, _shots):
+    return _previous_shot_summary(
+        _success_rows(with_previous_shot(_shots)), "success_stroke"
+    )
+
+
+@st.cache_data
+def compare_error_vs_success_factors(version, _shots):
     """Compare characteristics of opponent shots that lead to errors vs successes"""
-    error_summary = analyze_error_factors(shots)
-    success_summary = analyze_success_factors(shots)
+    context = with_previous_shot(_shots)
+    error_summary = _previous_shot_summary(_error_rows(context), "error_stroke")
+    success_summary = _previous_shot_summary(_success_rows(context), "success_stroke")
 
     if error_summary.empty or success_summary.empty:
         return pd.DataFrame()
 
-    comparison = pd.DataFrame()
-
-    for stroke in ["Forehand", "Backhand"]:
-        if stroke in error_summary.index and stroke in success_summary.index:
-            comparison = pd.concat(
-                [
-                    comparison,
-                    pd.DataFrame(
-                        {
-                            "stroke": [stroke],
-                            "error_count": [error_summary.loc[stroke, "count"]],
-                            "success_count": [success_summary.loc[stroke, "count"]],
-                            "error_avg_prev_speed": [
-                                error_summary.loc[stroke, "avg_prev_speed"]
-                            ],
-                            "success_avg_prev_speed": [
-                                success_summary.loc[stroke, "avg_prev_speed"]
-                            ],
-                            "error_prev_deep_pct": [
-                                error_summary.loc[stroke, "deep_pct"]
-                            ],
-                            "success_prev_deep_pct": [
-                                success_summary.loc[stroke, "deep_pct"]
-                            ],
-                        }
-                    ),
-                ]
-            )
-    return comparison
+    strokes = [
+        stroke
+        for stroke in ["Forehand", "Backhand"]
+        if stroke in error_summary.index and stroke in success_summary.index
+    ]
+    if not strokes:
+        return pd.DataFrame()
 
+    errors = error_summary.loc[strokes]
+    successes = success_summary.loc[strokes]
+    return pd.DataFrame(
+        {
+            "stroke": strokes,
+            "error_count": errors["count"].to_numpy(),
+            "success_count": successes["count"].to_numpy(),
+            "error_avg_prev_speed": errors["avg_prev_speed"].to_numpy(),
+            "success_avg_prev_speed": successes["avg_prev_speed"].to_numpy(),
+            "error_prev_deep_pct": errors["deep_pct"].to_numpy(),
+            "success_prev_deep_pct": successes["deep_pct"].to_numpy(),
+        }
+    )
 
-@st.cache_data
-def process_shots_for_court_zone(shots):
-    """Process shots data to normalize court perspective for left-handed player"""
-    HOST = "Joao Cassis"
 
-    # Filter for your shots only (excluding feeds, serve and returns)
-    shots = shots[
+def process_shots_for_court_zone(shots):
+    """My rally shots (no feeds, serves or returns)"""
+    return shots[
         (shots["player"] == HOST)
         & (~shots["stroke"].isin(["Feed", "Serve"]))
         & (~shots["type"].str.contains("_return"))
-    ].copy()
-
-    # Court dimensions
-    court_length = 23.77  # meters
-
-    # Normalize perspective - flip coordinates when hitting from far side
-    condition = shots["hit_y"] > court_length / 2
-    shots.loc[condition, "hit_x"] = -shots.loc[condition, "hit_x"]
-    shots.loc[condition, "hit_y"] = court_length - shots.loc[condition, "hit_y"]
-    shots.loc[condition, "bounce_x"] = -shots.loc[condition, "bounce_x"]
-    shots.loc[condition, "bounce_y"] = court_length - shots.loc[condition, "bounce_y"]
-
-    # Handle net shots
-    net_condition = shots["result"] == "Net"
-    shots.loc[net_condition, "bounce_y"] = court_length / 2
-
-    return shots
-
-
-@st.cache_data
-def get_court_zone(hit_x, hit_y):
-    """Get court zone for left-handed player"""
-    # Depth zones
-    if hit_y < 0:  # Service line
-        depth = "Deep"
-    elif hit_y < 6.4:  # Mid court
-        depth = "Mid"
-    else:  # Past service line on opponent side
-        depth = "Short"
-
-    # Width zones (adjusted for left-handed player)
-    if hit_x < -2:
-        width = "Ad"  # Left side is lefty's forehand
-    elif hit_x > 2:
-        width = "Deuce"  # Right side is lefty's backhand
-    else:
-        width = "Center"
-
-    return f"{depth} {width}"
+    ]
 
 
 @st.cache_data
-def analyze_court_zone_success(shots, points):
-    """Analyze success rates by court zone for left-handed player"""
-    HOST = "Joao Cassis"
-
-    # Process shots for consistent perspective
-    processed_df = process_shots_for_court_zone(shots)
+def analyze_court_zone_success(version, _shots, _points, grid=DEFAULT_ZONE_GRID):
+    """Analyze success rates by court zone of `grid` for left-handed player"""
+    processed_df = process_shots_for_court_zone(_shots)
 
     if processed_df.empty:
         return pd.DataFrame()
 
-    # Add court zones
-    processed_df["court_zone"] = processed_df.apply(
-        lambda row: get_court_zone(row["hit_x"], row["hit_y"]), axis=1
-    )
-
-    # Merge with points data to get point outcomes
-    zone_analysis = []
-
-    for zone in processed_df["court_zone"].unique():
-        zone_shots = processed_df[processed_df["court_zone"] == zone]
-
-        if len(zone_shots) == 0:
-            continue
-
-        total_shots = len(zone_shots)
-
-        # Calculate success metrics
-        shots_in = len(zone_shots[zone_shots["result"] == "In"])
-
-        # For shots that landed "In", check if they helped win the point
-        successful_points = 0
-        for _, shot in zone_shots[zone_shots["result"] == "In"].iterrows():
-            # Find the corresponding point outcome
-            point_data = points[
-                (points["match_id"] == shot["match_id"])
-                & (points["set"] == shot["set"])
-                & (points["game"] == shot["game"])
-                & (points["point"] == shot["point"])
-            ]
-
-            if not point_data.empty and point_data.iloc[-1]["point_winner"] == HOST:
-                successful_points += 1
-
-        # Calculate error rate
-        errors = len(zone_shots[zone_shots["result"].isin(["Out", "Net"])])
-
-        # Success rate = shots that landed in AND won the point / total shots
-        success_rate = successful_points / total_shots if total_shots > 0 else 0
-        error_rate = errors / total_shots if total_shots > 0 else 0
-        in_play_rate = shots_in / total_shots if total_shots > 0 else 0
-
-        zone_analysis.append(
+    # A shot succeeds when it landed in and its point was won
+    point_won = get_point_facts(version, _points, _shots)["won"].eq(True)
+    landed_in = processed_df["result"] == "In"
+    won = processed_df["point_key"].map(point_won).eq(True)
+    zones = (
+        pd.DataFrame(
             {
-                "Court Zone": zone,
-                "Total Shots": total_shots,
-                "Success Rate": success_rate,
-                "Error Rate": error_rate,
-                "In Play Rate": in_play_rate,
-                "Successful Points": successful_points,
-                "Errors": errors,
+                "Court Zone": zone_labels(
+                    processed_df["hit_x_n"], processed_df["hit_y_n"], grid
+                ),
+                "in_play": landed_in.to_numpy(),
+                "success": (landed_in & won).to_numpy(),
+                "error": processed_df["result"].isin(["Out", "Net"]).to_numpy(),
             }
         )
+        .groupby("Court Zone", sort=False)
+        .agg(
+            total=("in_play", "size"),
+            in_play=("in_play", "sum"),
+            success=("success", "sum"),
+            error=("error", "sum"),
+        )
+    )
 
-    df = pd.DataFrame(zone_analysis)
+    df = pd.DataFrame(
+        {
+            "Court Zone": zones.index,
+            "Total Shots": zones["total"].to_numpy(),
+            "Success Rate": (zones["success"] / zones["total"]).to_numpy(),
+            "Error Rate": (zones["error"] / zones["total"]).to_numpy(),
+            "In Play Rate": (zones["in_play"] / zones["total"]).to_numpy(),
+            "Successful Points": zones["success"].to_numpy(),
+            "Errors": zones["error"].to_numpy(),
+        }
+    )
 
-    if not df.empty:
-        # Sort by success rate descending
-        df = df.sort_values("Success Rate", ascending=False)
+    # Sort by success rate descending
+    df = df.sort_values("Success Rate", ascending=False, kind="stable")
 
-        # Add assessment column
-        df["Assessment"] = df["Success Rate"].apply(
-            lambda x: (
-                "🟢 Strength" if x > 0.6 else "🟡 Good" if x > 0.4 else "🔴 Weakness"
-            )
+    # Add assessment column
+    df["Assessment"] = df["Success Rate"].apply(
+        lambda x: (
+            "🟢 Strength" if x > 0.6 else "🟡 Good" if x > 0.4 else "🔴 Weakness"
         )
+    )
 
     return df
 
 
-def render_shot_analysis_tab(matches, points, shots):
+def warm_cache(version, matches, points, shots):
+    """Run this tab's cached analytics."""
+    get_good_shots(version, shots)
+    get_bad_shots(version, shots)
+    compare_error_vs_success_factors(version, shots)
+    analyze_court_zone_success(version, shots, points)
+    get_heatmap_grids(version, shots)
+
+
+def render_shot_analysis_tab(version, matches, points, shots):
     """Main function for the Shot Analysis tab"""
     st.header("🎾 Shot Analysis - Strengths and Weaknesses")
 
@@ -360,7 +284,7 @@ def render_shot_analysis_tab(matches, points, shots):
 
     with col1:
         st.write("**Best Shots (Strengths)**")
-        good_shots = get_good_shots(shots)
+        good_shots = get_good_shots(version, shots)
         if not good_shots.empty:
             st.dataframe(
                 good_shots.style.format(
@@ -375,7 +299,7 @@ def render_shot_analysis_tab(matches, points, shots):
 
     with col2:
         st.write("**Problematic Shots (Areas to Improve)**")
-        bad_shots = get_bad_shots(shots)
+        bad_shots = get_bad_shots(version, shots)
         if not bad_shots.empty:
             st.dataframe(
                 bad_shots.style.format(
@@ -391,7 +315,7 @@ def render_shot_analysis_tab(matches, points, shots):
 
     # Error vs Success Analysis
     st.subheader("🔍 Error vs Success Pattern Analysis")
-    comparison_df = compare_error_vs_success_factors(shots)
+    comparison_df = compare_error_vs_success_factors(version, shots)
     if not comparison_df.empty:
         st.write("**What conditions lead to errors vs success on your shots:**")
         st.dataframe(comparison_df, width='stretch')
@@ -401,7 +325,14 @@ def render_shot_analysis_tab(matches, points, shots):
     # Court Zone Analysis
     st.subheader("🎯 Court Zone Success Analysis")
 
-    zone_analysis = analyze_court_zone_success(shots, points)
+    grid = st.radio(
+        "Zone grid",
+        list(ZONE_GRIDS),
+        index=list(ZONE_GRIDS).index(DEFAULT_ZONE_GRID),
+        horizontal=True,
+        help="Depth x width bands of the court, measured from your baseline.",
+    )
+    zone_analysis = analyze_court_zone_success(version, shots, points, grid)
     if not zone_analysis.empty:
         # Display the zone analysis table
         st.dataframe(
@@ -437,3 +368,5 @@ def render_shot_analysis_tab(matches, points, shots):
                 )
     else:
         st.info("Not enough data for court zone analysis.")
+
+    render_heatmap_section(version, matches, shots)
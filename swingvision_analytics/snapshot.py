@@ -0,0 +1,84 @@
+"""
+Snapshot module for SwingVision analytics
+Keeps a local columnar copy of the SwingVision tables so a cold process can
+start from disk instead of reloading everything from Postgres
+"""
+
+import hashlib
+import os
+from pathlib import Path
+
+import pyarrow as pa
+
+# Bump when the on-disk layout changes so old snapshots are ignored
+SNAPSHOT_FORMAT = 1
+
+SNAPSHOT_DIR = Path(
+    os.environ.get("SWINGVISION_SNAPSHOT_DIR", Path.home() / ".cache" / "swingvision")
+)
+
+TOKEN_FILE = "token"
+
+
+def snapshot_token(match_ids) -> str:
+    """Table-change token: uploads add match_ids, so the sorted id set versions the data."""
+    digest = hashlib.sha1(f"format:{SNAPSHOT_FORMAT}".encode("utf-8"))
+    for match_id in sorted(str(m) for m in match_ids):
+        digest.update(b"|")
+        digest.update(match_id.encode("utf-8"))
+    return digest.hexdigest()
+
+
+def _table_path(table_name: str) -> Path:
+    return SNAPSHOT_DIR / f"{table_name}.arrow"
+
+
+def read_snapshot(token: str, table_names):
+    """
+    Return {table_name: DataFrame} if the snapshot on disk was written for
+    `token`, else None. Files are Arrow IPC and opened memory-mapped.
+    """
+    try:
+        stored = (SNAPSHOT_DIR / TOKEN_FILE).read_text().strip()
+    except OSError:
+        return None
+    if stored != token:
+        return None
+
+    frames = {}
+    try:
+        for table_name in table_names:
+            path = _table_path(table_name)
+            if not path.exists():
+                continue
+            source = pa.memory_map(str(path), "r")
+            frames[table_name] = pa.ipc.open_file(source).read_all().to_pandas()
+    except (OSError, pa.ArrowException) as e:
+        print(f"Ignoring unreadable SwingVision snapshot: {e}")
+        return None
+    return frames
+
+
+def write_snapshot(token: str, frames: dict) -> bool:
+    """
+    Rewrite the snapshot for `token`. Table files are replaced first and the
+    token last, so a partial write is never mistaken for a current snapshot.
+    """
+    try:
+        SNAPSHOT_DIR.mkdir(parents=True, exist_ok=True)
+        (SNAPSHOT_DIR / TOKEN_FILE).unlink(missing_ok=True)
+        for table_name, df in frames.items():
+            table = pa.Table.from_pandas(df, preserve_index=False)
+            path = _table_path(table_name)
+            tmp = path.with_suffix(".tmp")
+            with pa.OSFile(str(tmp), "wb") as sink:
+                with pa.ipc.new_file(sink, table.schema) as writer:
+                    writer.write_table(table)
+            os.replace(tmp, path)
+        tmp = SNAPSHOT_DIR / f"{TOKEN_FILE}.tmp"
+        tmp.write_text(token)
+        os.replace(tmp, SNAPSHOT_DIR / TOKEN_FILE)
+    except (OSError, pa.ArrowException) as e:
+        print(f"Could not write SwingVision snapshot: {e}")
+        return False
+    return True
@@ -6,96 +6,37 @@ Contains functions for analyzing tactical patterns and game strategies
 import streamlit as st
 import pandas as pd
 
+from .data_processing import classify_game_types, get_point_facts
+
 HOST = "Joao Cassis"
 
 
 def identify_tie_breaks(points):
     """Identify which games are tie-breaks vs regular games"""
-    tie_break_info = {}
-
-    for _, point in points.iterrows():
-        match_id = point["match_id"]
-        set_num = point["set"]
-        game_num = point["game"]
-
-        key = f"{match_id}_Set{set_num}_Game{game_num}"
-
-        if key not in tie_break_info:
-            tie_break_info[key] = {
-                "match_id": match_id,
-                "set": set_num,
-                "game": game_num,
-                "points": [],
-                "has_impossible_scores": False,
-            }
-
-        tie_break_info[key]["points"].append(point)
-
-        # Check for impossible tennis scores (indicates tie-break scoring confusion)
-        impossible_scores = ["AD-AD", "15-AD", "30-AD", "AD-30", "AD-0", "0-AD"]
-        score = f"{point['host_game_score']}-{point['guest_game_score']}"
-        if score in impossible_scores:
-            tie_break_info[key]["has_impossible_scores"] = True
-
-    # Classify each game
-    classifications = {}
-
-    for key, info in tie_break_info.items():
-        match_id = info["match_id"]
-        set_num = info["set"]
-        game_num = info["game"]
-
-        # Get all games in this set to understand structure
-        set_games = [
-            k
-            for k in tie_break_info.keys()
-            if tie_break_info[k]["match_id"] == match_id
-            and tie_break_info[k]["set"] == set_num
-        ]
-
-        set_game_numbers = [tie_break_info[k]["game"] for k in set_games]
-        min_game = min(set_game_numbers)
-        max_game = max(set_game_numbers)
-
-        # Classification logic
-        if info["has_impossible_scores"]:
-            # Has impossible scores = tie-break
-            if set_num == 3:
-                game_type = "match_tie_break"
-            else:
-                game_type = "set_tie_break"
-        elif set_num == 3 and len(set_game_numbers) == 1:
-            # Single game in Set 3 = likely match tie-break
-            game_type = "match_tie_break"
-        elif game_num == 13 and game_num == max_game:
-            # Game 13 that ends the set = set tie-break
-            game_type = "set_tie_break"
-        else:
-            # Regular game
-            game_type = "regular"
+    games = points[["match_id", "set", "game"]].assign(game_type=_game_types(points))
+    games = games.drop_duplicates(["match_id", "set", "game"])
+    return {
+        f"{match_id}_Set{set_num}_Game{game_num}": game_type
+        for match_id, set_num, game_num, game_type in games.itertuples(index=False)
+    }
 
-        classifications[key] = game_type
 
-    return classifications
+def _game_types(points):
+    """game_type per point, as set by data_processing.prepare_frames."""
+    if "game_type" in points.columns:
+        return points["game_type"]
+    return classify_game_types(points)
 
 
 @st.cache_data
-def get_first_point_winner_outcome(points):
+def get_first_point_winner_outcome(version, _points):
     """Analyze first point impact on game outcome (regular games only)"""
-    game_classifications = identify_tie_breaks(points)
-
     # Filter for regular games only
-    regular_points = []
-    for _, point in points.iterrows():
-        key = f"{point['match_id']}_Set{point['set']}_Game{point['game']}"
-        if game_classifications.get(key) == "regular":
-            regular_points.append(point)
+    regular_df = _points[_game_types(_points) == "regular"]
 
-    if not regular_points:
+    if regular_df.empty:
         return pd.DataFrame()
 
-    regular_df = pd.DataFrame(regular_points)
-
     first_points = (
         regular_df.groupby(["match_id", "set", "game"], as_index=False)
         .first()
@@ -122,17 +63,17 @@ def get_first_point_winner_outcome(points):
 
 
 @st.cache_data
-def analyze_serve_first_advantage(points):
+def analyze_serve_first_advantage(version, _points):
     """Analyze if serving first in the set gives advantage to win the set"""
     first_points_per_set = (
-        points.groupby(["match_id", "set"], as_index=False)
+        _points.groupby(["match_id", "set"], as_index=False)
         .first()
         .rename(columns={"match_server": "set_first_server"})[
             ["match_id", "set", "set_first_server"]
         ]
     )
     last_points_per_set = (
-        points.groupby(["match_id", "set"], as_index=False)
+        _points.groupby(["match_id", "set"], as_index=False)
         .last()
         .rename(columns={"point_winner": "set_winner"})[
             ["match_id", "set", "set_winner"]
@@ -160,51 +101,20 @@ def analyze_serve_first_advantage(points):
 
 
 @st.cache_data
-def analyze_rally_length_impact(shots, points):
+def analyze_rally_length_impact(version, _shots, _points):
     """Analyze how performance changes in short vs long rallies"""
-    rally_analysis = []
-
-    # Group shots by point to count rally length
-    for (match_id, set_num, game, point), point_shots in shots.groupby(
-        ["match_id", "set", "game", "point"]
-    ):
-        # Filter out feeds and serves for rally counting
-        rally_shots = point_shots[~point_shots["stroke"].isin(["Feed", "Serve"])]
-        rally_length = len(rally_shots)
-
-        if rally_length == 0:
-            continue
-
-        # Get point winner
-        point_data = points[
-            (points["match_id"] == match_id)
-            & (points["set"] == set_num)
-            & (points["game"] == game)
-            & (points["point"] == point)
-        ]
-
-        if point_data.empty:
-            continue
-
-        point_winner = point_data.iloc[-1]["point_winner"]
-        won_point = point_winner == HOST
-
-        # Count my shots in this rally
-        my_shots_in_rally = len(rally_shots[rally_shots["player"] == HOST])
-
-        rally_analysis.append(
-            {
-                "match_id": match_id,
-                "rally_length": rally_length,
-                "my_shots_count": my_shots_in_rally,
-                "won_point": won_point,
-                "point_detail": (
-                    point_data.iloc[-1]["detail"] if not point_data.empty else ""
-                ),
-            }
-        )
-
-    df = pd.DataFrame(rally_analysis)
+    # Rally length (feeds and serves excluded) and outcome per point
+    facts = get_point_facts(version, _points, _shots)
+    facts = facts[(facts["n_shots"] > 0) & (facts["rally_strokes"] > 0)]
+    df = pd.DataFrame(
+        {
+            "match_id": facts["match_id"],
+            "rally_length": facts["rally_strokes"],
+            "my_shots_count": facts["my_rally_strokes"],
+            "won_point": facts["won"],
+            "point_detail": facts["detail"],
+        }
+    ).reset_index(drop=True)
 
     if df.empty:
         return pd.DataFrame()
@@ -233,66 +143,61 @@ def analyze_rally_length_impact(shots, points):
     return rally_performance
 
 
-@st.cache_data
-def analyze_game_score_performance(points):
-    """Analyze performance at different game scores (REGULAR GAMES ONLY)"""
-    game_classifications = identify_tie_breaks(points)
+def _game_scores(points):
+    """host and guest game score per point, as string categoricals."""
+    scores = []
+    for col in ("host_game_score", "guest_game_score"):
+        score = points[col].astype("category")
+        scores.append(score.cat.rename_categories(score.cat.categories.astype(str)))
+    return scores
 
-    # Filter for regular games only
-    regular_points = []
-    for _, point in points.iterrows():
-        key = f"{point['match_id']}_Set{point['set']}_Game{point['game']}"
-        if game_classifications.get(key) == "regular":
-            regular_points.append(point)
 
-    if not regular_points:
-        return pd.DataFrame(), pd.DataFrame()
+def _clutch_situations(points):
+    """Boolean mask per clutch situation, only meaningful in regular games."""
+    host_score, guest_score = _game_scores(points)
+    deuce = (host_score == "40") & (guest_score == "40")
+    advantage = [
+        host_score.isin([c for c in host_score.cat.categories if "AD" in c]),
+        guest_score.isin([c for c in guest_score.cat.categories if "AD" in c]),
+    ]
+    return {
+        "break_point": points["break_point"].astype(bool),
+        "set_point": points["set_point"].astype(bool),
+        "deuce_or_ad": advantage[0] | advantage[1] | deuce,
+        "tight_game": host_score.isin(["30", "40"]) & guest_score.isin(["30", "40"]),
+    }
 
-    # Map score combinations to readable format
-    def format_game_score(host_score, guest_score):
-        score_map = {"0": "0", "15": "15", "30": "30", "40": "40", "AD": "AD"}
-        return f"{score_map.get(str(host_score), str(host_score))}-{score_map.get(str(guest_score), str(guest_score))}"
-
-    game_score_data = []
-
-    for point in regular_points:
-        host_score = point["host_game_score"]
-        guest_score = point["guest_game_score"]
-
-        # Skip if scores are missing
-        if pd.isna(host_score) or pd.isna(guest_score):
-            continue
-
-        game_score = format_game_score(host_score, guest_score)
-        won_point = point["point_winner"] == HOST
-        is_serving = point["match_server"] == HOST
-
-        # Identify critical situations (only valid in regular games)
-        is_deuce = str(host_score) == "40" and str(guest_score) == "40"
-        is_break_point = point["break_point"]
-        is_set_point = point["set_point"]
-
-        game_score_data.append(
-            {
-                "game_score": game_score,
-                "won_point": won_point,
-                "is_serving": is_serving,
-                "is_deuce": is_deuce,
-                "is_break_point": is_break_point,
-                "is_set_point": is_set_point,
-                "match_id": point["match_id"],
-            }
-        )
 
-    df = pd.DataFrame(game_score_data)
+@st.cache_data
+def analyze_game_score_performance(version, _points):
+    """Analyze performance at different game scores (REGULAR GAMES ONLY)"""
+    # Filter for regular games only
+    regular_points = _points[_game_types(_points) == "regular"]
 
-    if df.empty:
+    host_score, guest_score = _game_scores(regular_points)
+    scored = (host_score.notna() & guest_score.notna()).to_numpy()
+
+    if not scored.any():
         return pd.DataFrame(), pd.DataFrame()
 
-    # Analyze performance by game score
-    score_performance = (
-        df.groupby("game_score").agg({"won_point": ["count", "sum", "mean"]}).round(3)
-    )
+    df = pd.DataFrame(
+        {
+            "won_point": regular_points["point_winner"] == HOST,
+            "is_deuce": (host_score == "40") & (guest_score == "40"),
+            "is_break_point": regular_points["break_point"],
+            "is_set_point": regular_points["set_point"],
+        }
+    )[scored]
+
+    # Analyze performance by game score: count per (host, guest) score pair,
+    # then label the pairs "host-guest"
+    pairs = [host_score[scored], guest_score[scored]]
+    by_pair = df.groupby(pairs, observed=True)["won_point"].agg(["count", "sum"])
+    labels = by_pair.index.get_level_values(0).astype(str) + "-"
+    labels += by_pair.index.get_level_values(1).astype(str)
+    score_performance = by_pair.groupby(labels.rename("game_score")).sum()
+    score_performance["mean"] = score_performance["sum"] / score_performance["count"]
+    score_performance = score_performance.round(3)
 
     score_performance.columns = ["Total_Points", "Points_Won", "Win_Rate"]
 
@@ -311,85 +216,100 @@ def analyze_game_score_performance(points):
     return score_performance, critical_situations
 
 
+TIE_BREAK_KEYS = ["match_id", "set", "game"]
+
+
+def _first_at(tallies, reached, value, index):
+    """
+    Per tie-break, `value` at the first point where `reached` holds, None
+    for tie-breaks where it never does. Like a column built from per-row
+    dicts, the result is object dtype only when some value is None.
+    """
+    first = tallies[reached].drop_duplicates(TIE_BREAK_KEYS)
+    first = value[first.index].set_axis(pd.MultiIndex.from_frame(first[TIE_BREAK_KEYS]))
+    first = first.reindex(index)
+    if first.notna().all():
+        return first.infer_objects()
+    first = first.astype(object)
+    return first.where(first.notna(), None)
+
+
+def _tie_break_table(tb_points, first_to, match_point=False):
+    """
+    One row per tie-break (match_id, set, game) in `tb_points`, from running
+    host/opponent tallies over all tie-break points at once: points won,
+    winner (last point), opponent name, who got to each score in `first_to`
+    first and, with `match_point`, whether I reached match point (9 points
+    with a 2-point lead, or 10) before the opponent did.
+    """
+    df = tb_points.sort_values(TIE_BREAK_KEYS + ["point"], kind="stable")
+    winner = df["point_winner"].astype(object)
+    server = df["match_server"].astype(object)
+    mine = winner == HOST
+    tallies = df[TIE_BREAK_KEYS].assign(
+        host=mine.astype(int), opponent=(~mine).astype(int)
+    )
+    running = tallies.groupby(TIE_BREAK_KEYS)[["host", "opponent"]].cumsum()
+    tallies[["host", "opponent"]] = running
+
+    grouped = tallies.groupby(TIE_BREAK_KEYS)
+    table = grouped.size().rename("total_points").to_frame()
+    table["joao_points"] = grouped["host"].max()
+    index = table.index
+
+    # Winner: last point winner
+    last = df.index.isin(tallies.drop_duplicates(TIE_BREAK_KEYS, keep="last").index)
+    table["won_tie_break"] = _first_at(tallies, last, mine, index).astype(bool)
+
+    # Opponent name: first point won by someone else, or served by someone else
+    named = (winner != HOST) | (server != HOST)
+    opponent = _first_at(tallies, named, winner.where(winner != HOST, server), index)
+    has_name = index.isin(pd.MultiIndex.from_frame(tallies.loc[named, TIE_BREAK_KEYS]))
+    table["opponent"] = opponent.where(has_name, "Opponent")
+
+    for target in first_to:
+        reached = (tallies["host"] >= target) | (tallies["opponent"] >= target)
+        table[f"first_to_{target}"] = _first_at(
+            tallies, reached, tallies["host"] >= target, index
+        )
+
+    if match_point:
+        host, opp = tallies["host"], tallies["opponent"]
+        mine_mp = ((host >= 9) & (host - opp >= 2)) | (host >= 10)
+        theirs_mp = ((opp >= 9) & (opp - host >= 2)) | (opp >= 10)
+        table["reached_match_point"] = (
+            _first_at(tallies, mine_mp | theirs_mp, mine_mp, index)
+            .fillna(False)
+            .astype(bool)
+        )
+
+    table["opponent_points"] = table["total_points"] - table["joao_points"]
+    table["final_score"] = (
+        table["joao_points"].astype(str) + "-" + table["opponent_points"].astype(str)
+    )
+    columns = [
+        "opponent",
+        "total_points",
+        "joao_points",
+        "opponent_points",
+        "won_tie_break",
+        *[f"first_to_{target}" for target in first_to],
+        *(["reached_match_point"] if match_point else []),
+        "final_score",
+    ]
+    return table[columns].reset_index()
+
+
 @st.cache_data
-def analyze_set_tie_break_performance(points):
+def analyze_set_tie_break_performance(version, _points):
     """Analyze performance in set tie-breaks"""
-    game_classifications = identify_tie_breaks(points)
-
     # Filter for set tie-breaks only
-    set_tb_points = []
-    for _, point in points.iterrows():
-        key = f"{point['match_id']}_Set{point['set']}_Game{point['game']}"
-        if game_classifications.get(key) == "set_tie_break":
-            set_tb_points.append(point)
+    set_tb_df = _points[_game_types(_points) == "set_tie_break"]
 
-    if not set_tb_points:
+    if set_tb_df.empty:
         return pd.DataFrame()
 
-    set_tb_df = pd.DataFrame(set_tb_points)
-
-    # Group by tie-break (match_id, set, game)
-    tie_break_results = []
-
-    for (match_id, set_num, game_num), tb_points in set_tb_df.groupby(
-        ["match_id", "set", "game"]
-    ):
-        tb_points_sorted = tb_points.sort_values("point")
-
-        total_points = len(tb_points_sorted)
-        joao_points = len(tb_points_sorted[tb_points_sorted["point_winner"] == HOST])
-        opponent_points = total_points - joao_points
-
-        # Get winner (last point winner)
-        winner = tb_points_sorted.iloc[-1]["point_winner"]
-        won_tb = winner == HOST
-
-        # Get opponent name (approximate from server/winner data)
-        opponent = "Opponent"
-        for _, point in tb_points_sorted.iterrows():
-            if point["point_winner"] != HOST:
-                opponent = point["point_winner"]
-                break
-            elif point["match_server"] != HOST:
-                opponent = point["match_server"]
-                break
-
-        # Calculate first-to-X performance
-        first_to_3 = None
-        first_to_5 = None
-
-        joao_count = 0
-        opp_count = 0
-
-        for _, point in tb_points_sorted.iterrows():
-            if point["point_winner"] == HOST:
-                joao_count += 1
-            else:
-                opp_count += 1
-
-            if first_to_3 is None and (joao_count >= 3 or opp_count >= 3):
-                first_to_3 = joao_count >= 3
-
-            if first_to_5 is None and (joao_count >= 5 or opp_count >= 5):
-                first_to_5 = joao_count >= 5
-
-        tie_break_results.append(
-            {
-                "match_id": match_id,
-                "set": set_num,
-                "game": game_num,
-                "opponent": opponent,
-                "total_points": total_points,
-                "joao_points": joao_points,
-                "opponent_points": opponent_points,
-                "won_tie_break": won_tb,
-                "first_to_3": first_to_3,
-                "first_to_5": first_to_5,
-                "final_score": f"{joao_points}-{opponent_points}",
-            }
-        )
-
-    results_df = pd.DataFrame(tie_break_results)
+    results_df = _tie_break_table(set_tb_df, first_to=[3, 5])
 
     if results_df.empty:
         return pd.DataFrame()
@@ -413,93 +333,15 @@ def analyze_set_tie_break_performance(points):
 
 
 @st.cache_data
-def analyze_match_tie_break_performance(points):
+def analyze_match_tie_break_performance(version, _points):
     """Analyze performance in match tie-breaks"""
-    game_classifications = identify_tie_breaks(points)
-
     # Filter for match tie-breaks only
-    match_tb_points = []
-    for _, point in points.iterrows():
-        key = f"{point['match_id']}_Set{point['set']}_Game{point['game']}"
-        if game_classifications.get(key) == "match_tie_break":
-            match_tb_points.append(point)
+    match_tb_df = _points[_game_types(_points) == "match_tie_break"]
 
-    if not match_tb_points:
+    if match_tb_df.empty:
         return pd.DataFrame()
 
-    match_tb_df = pd.DataFrame(match_tb_points)
-
-    # Group by tie-break (match_id, set, game)
-    tie_break_results = []
-
-    for (match_id, set_num, game_num), tb_points in match_tb_df.groupby(
-        ["match_id", "set", "game"]
-    ):
-        tb_points_sorted = tb_points.sort_values("point")
-
-        total_points = len(tb_points_sorted)
-        joao_points = len(tb_points_sorted[tb_points_sorted["point_winner"] == HOST])
-        opponent_points = total_points - joao_points
-
-        # Get winner (last point winner)
-        winner = tb_points_sorted.iloc[-1]["point_winner"]
-        won_tb = winner == HOST
-
-        # Get opponent name
-        opponent = "Opponent"
-        for _, point in tb_points_sorted.iterrows():
-            if point["point_winner"] != HOST:
-                opponent = point["point_winner"]
-                break
-            elif point["match_server"] != HOST:
-                opponent = point["match_server"]
-                break
-
-        # Calculate performance at different score milestones
-        first_to_5 = None
-        first_to_8 = None
-        reached_match_point = False
-
-        joao_count = 0
-        opp_count = 0
-
-        for _, point in tb_points_sorted.iterrows():
-            if point["point_winner"] == HOST:
-                joao_count += 1
-            else:
-                opp_count += 1
-
-            if first_to_5 is None and (joao_count >= 5 or opp_count >= 5):
-                first_to_5 = joao_count >= 5
-
-            if first_to_8 is None and (joao_count >= 8 or opp_count >= 8):
-                first_to_8 = joao_count >= 8
-
-            # Check if reached match point (9 points with 2-point lead, or 10 points)
-            if (joao_count >= 9 and joao_count - opp_count >= 2) or joao_count >= 10:
-                reached_match_point = True
-                break
-            elif (opp_count >= 9 and opp_count - joao_count >= 2) or opp_count >= 10:
-                break
-
-        tie_break_results.append(
-            {
-                "match_id": match_id,
-                "set": set_num,
-                "game": game_num,
-                "opponent": opponent,
-                "total_points": total_points,
-                "joao_points": joao_points,
-                "opponent_points": opponent_points,
-                "won_tie_break": won_tb,
-                "first_to_5": first_to_5,
-                "first_to_8": first_to_8,
-                "reached_match_point": reached_match_point,
-                "final_score": f"{joao_points}-{opponent_points}",
-            }
-        )
-
-    results_df = pd.DataFrame(tie_break_results)
+    results_df = _tie_break_table(match_tb_df, first_to=[5, 8], match_point=True)
 
     if results_df.empty:
         return pd.DataFrame()
@@ -538,78 +380,56 @@ def analyze_match_tie_break_performance(points):
 
 
 @st.cache_data
-def analyze_clutch_performance(points):
+def analyze_clutch_performance(version, _points):
     """Analyze late-game clutch performance in critical moments (REGULAR GAMES ONLY)"""
-    game_classifications = identify_tie_breaks(points)
-
     # Filter for regular games only
-    regular_points = []
-    for _, point in points.iterrows():
-        key = f"{point['match_id']}_Set{point['set']}_Game{point['game']}"
-        if game_classifications.get(key) == "regular":
-            regular_points.append(point)
+    regular_points = _points[_game_types(_points) == "regular"]
 
-    if not regular_points:
-        return pd.DataFrame(), pd.DataFrame()
+    won_point = regular_points["point_winner"] == HOST
+    is_serving = (regular_points["match_server"] == HOST).rename("is_serving")
 
-    clutch_situations = []
-
-    for point in regular_points:
-        won_point = point["point_winner"] == HOST
-        is_serving = point["match_server"] == HOST
-
-        # Define clutch situations (only valid in regular games)
-        situations = {
-            "break_point": point["break_point"],
-            "set_point": point["set_point"],
-            "deuce_or_ad": "AD" in str(point["host_game_score"])
-            or "AD" in str(point["guest_game_score"])
-            or (
-                str(point["host_game_score"]) == "40"
-                and str(point["guest_game_score"]) == "40"
-            ),
-            "tight_game": str(point["host_game_score"]) in ["30", "40"]
-            and str(point["guest_game_score"]) in ["30", "40"],
-        }
-
-        for situation_name, is_situation in situations.items():
-            if is_situation:
-                clutch_situations.append(
-                    {
-                        "situation": situation_name,
-                        "won_point": won_point,
-                        "is_serving": is_serving,
-                        "match_id": point["match_id"],
-                        "set": point["set"],
-                        "game": point["game"],
-                    }
-                )
-
-    df = pd.DataFrame(clutch_situations)
+    # A point counts once for every situation it is in
+    by_situation = {
+        name: won_point[mask].groupby(is_serving[mask]).agg(["count", "sum"])
+        for name, mask in _clutch_situations(regular_points).items()
+        if mask.any()
+    }
 
-    if df.empty:
+    if not by_situation:
         return pd.DataFrame(), pd.DataFrame()
 
     # Analyze clutch performance by situation
-    clutch_analysis = (
-        df.groupby(["situation", "is_serving"])
-        .agg({"won_point": ["count", "sum", "mean"]})
-        .round(3)
-    )
-
-    clutch_analysis.columns = ["Total_Points", "Points_Won", "Win_Rate"]
+    clutch_analysis = pd.concat(by_situation, names=["situation"]).sort_index()
 
     # Overall clutch performance
-    overall_clutch = (
-        df.groupby("situation").agg({"won_point": ["count", "sum", "mean"]}).round(3)
-    )
+    overall_clutch = clutch_analysis.groupby(level="situation").sum()
+
+    results = []
+    for table in (overall_clutch, clutch_analysis):
+        table = table.assign(mean=table["sum"] / table["count"]).round(3)
+        table.columns = ["Total_Points", "Points_Won", "Win_Rate"]
+        results.append(table)
+
+    return tuple(results)
+
 
-    overall_clutch.columns = ["Total_Points", "Points_Won", "Win_Rate"]
+def _mark(flags):
+    """✅/❌ per tie-break flag, — where the score was never reached (None)."""
+    return flags.map({True: "✅", False: "❌"}).fillna("—")
 
-    return overall_clutch, clutch_analysis
 
+def warm_cache(version, matches, points, shots):
+    """Run this tab's cached analytics."""
+    get_first_point_winner_outcome(version, points)
+    analyze_serve_first_advantage(version, points)
+    analyze_rally_length_impact(version, shots, points)
+    analyze_game_score_performance(version, points)
+    analyze_set_tie_break_performance(version, points)
+    analyze_match_tie_break_performance(version, points)
+    analyze_clutch_performance(version, points)
 
-def render_tactical_analysis_tab(matches, points, shots):
+
+def render_tactical_analysis_tab(version, matches, points, shots):
     """Main function for the Tactical Analysis tab"""
     st.header("🧠 Tactical Analysis - Game Strategy Analysis")
 
@@ -619,7 +439,7 @@ def render_tactical_analysis_tab(matches, points, shots):
 
     with col1:
         st.write("**First Point Winner Impact on Game**")
-        first_point_stats = get_first_point_winner_outcome(points)
+        first_point_stats = get_first_point_winner_outcome(version, points)
         if not first_point_stats.empty:
             st.dataframe(
                 first_point_stats.style.format({"win_pct": "{:.1%}"}),
@@ -628,7 +448,7 @@ def render_tactical_analysis_tab(matches, points, shots):
 
     with col2:
         st.write("**Serve First Advantage in Sets**")
-        serve_first_stats = analyze_serve_first_advantage(points)
+        serve_first_stats = analyze_serve_first_advantage(version, points)
         if not serve_first_stats.empty:
             st.dataframe(
                 serve_first_stats.style.format({"win_pct": "{:.1%}"}),
@@ -636,7 +456,7 @@ def render_tactical_analysis_tab(matches, points, shots):
             )
 
     st.subheader("🎾 Rally Length Performance Analysis")
-    rally_performance = analyze_rally_length_impact(shots, points)
+    rally_performance = analyze_rally_length_impact(version, shots, points)
 
     if not rally_performance.empty:
         st.dataframe(
@@ -650,7 +470,7 @@ def render_tactical_analysis_tab(matches, points, shots):
 
     # REGULAR GAMES ANALYSIS
     st.subheader("🎯 Regular Games - Game Score Performance")
-    score_perf, critical_perf = analyze_game_score_performance(points)
+    score_perf, critical_perf = analyze_game_score_performance(version, points)
 
     col1, col2 = st.columns(2)
 
@@ -673,7 +493,7 @@ def render_tactical_analysis_tab(matches, points, shots):
     # SET TIE-BREAKS ANALYSIS
     st.subheader("🏆 Set Tie-Breaks Performance")
 
-    set_tb_data = analyze_set_tie_break_performance(points)
+    set_tb_data = analyze_set_tie_break_performance(version, points)
 
     if not set_tb_data.empty:
         # Display summary statistics
@@ -703,19 +523,16 @@ def render_tactical_analysis_tab(matches, points, shots):
             "first_to_5",
         ]
         display_df = set_tb_data[display_cols].copy()
+        # Flags first: None (score never reached) would not survive the str cast
+        display_df["Result"] = display_df["won_tie_break"].map(
+            {True: "✅ WON", False: "❌ LOST"}
+        )
+        display_df["First to 3"] = _mark(display_df["first_to_3"])
+        display_df["First to 5"] = _mark(display_df["first_to_5"])
         # Convert any UUID columns to strings for display
         for col in display_df.columns:
             if display_df[col].dtype == "object":
                 display_df[col] = display_df[col].astype(str)
-        display_df["Result"] = display_df["won_tie_break"].map(
-            {True: "✅ WON", False: "❌ LOST"}
-        )
-        display_df["First to 3"] = display_df["first_to_3"].map(
-            {True: "✅", False: "❌"}
-        )
-        display_df["First to 5"] = display_df["first_to_5"].map(
-            {True: "✅", False: "❌"}
-        )
 
         st.dataframe(
             display_df[
@@ -730,7 +547,7 @@ def render_tactical_analysis_tab(matches, points, shots):
     # MATCH TIE-BREAKS ANALYSIS
     st.subheader("🥇 Match Tie-Breaks Performance")
 
-    match_tb_data = analyze_match_tie_break_performance(points)
+    match_tb_data = analyze_match_tie_break_performance(version, points)
 
     if not match_tb_data.empty:
         # Display summary statistics
@@ -774,22 +591,17 @@ def render_tactical_analysis_tab(matches, points, shots):
             "reached_match_point",
         ]
         display_df = match_tb_data[display_cols].copy()
+        # Flags first: None (score never reached) would not survive the str cast
+        display_df["Result"] = display_df["won_tie_break"].map(
+            {True: "✅ WON", False: "❌ LOST"}
+        )
+        display_df["First to 5"] = _mark(display_df["first_to_5"])
+        display_df["First to 8"] = _mark(display_df["first_to_8"])
+        display_df["Reached MP"] = _mark(display_df["reached_match_point"])
         # Convert any UUID columns to strings for display
         for col in display_df.columns:
             if display_df[col].dtype == "object":
                 display_df[col] = display_df[col].astype(str)
-        display_df["Result"] = display_df["won_tie_break"].map(
-            {True: "✅ WON", False: "❌ LOST"}
-        )
-        display_df["First to 5"] = display_df["first_to_5"].map(
-            {True: "✅", False: "❌"}
-        )
-        display_df["First to 8"] = display_df["first_to_8"].map(
-            {True: "✅", False: "❌"}
-        )
-        display_df["Reached MP"] = display_df["reached_match_point"].map(
-            {True: "✅", False: "❌"}
-        )
 
         st.dataframe(
             display_df[
@@ -810,7 +622,7 @@ def render_tactical_analysis_tab(matches, points, shots):
 
     # CLUTCH PERFORMANCE (Regular Games)
     st.subheader("⚡ Clutch Performance Analysis (Regular Games)")
-    overall_clutch, detailed_clutch = analyze_clutch_performance(points)
+    overall_clutch, detailed_clutch = analyze_clutch_performance(version, points)
 
     if not overall_clutch.empty:
         st.write("**Performance in Pressure Situations:**")
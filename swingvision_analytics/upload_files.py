@@ -10,6 +10,7 @@ import uuid
 import pandas as pd
 import streamlit as st
 from db import engine
+from sqlalchemy import text
 
 from .data_processing import (
     STATUS_COMPLETED,
@@ -21,7 +22,13 @@ from .data_processing import (
     infer_match_status,
     format_scoreline,
     scoreline_from_sets,
+    forget_table,
+    match_metric_rows,
 )
+from .court import COURT_LENGTH, normalized_coordinates
+from .dataset import get_dataset
+from .metrics import MATCH_METRICS_VERSION
+from .rallies import build_rally_table
 from .schema import ensure_schema
 
 
@@ -403,6 +410,8 @@ def upload_files():
 
         points_df["match_id"] = match_id
         shots_df["match_id"] = match_id
+        shots_df = shots_df.join(normalized_coordinates(shots_df))
+        rallies_df = build_rally_table(shots_df)
 
         match_row = pd.DataFrame(
             [
@@ -422,16 +431,28 @@ def upload_files():
                 }
             ]
         )
-
-        match_row.to_sql(
-            "swingvision_matches", engine, if_exists="append", index=False
+        metrics_df = match_metric_rows(
+            match_row, points_df, shots_df, sets_df, rallies_df
         )
-        points_df.to_sql("swingvision_points", engine, if_exists="append", index=False)
-        shots_df.to_sql("swingvision_shots", engine, if_exists="append", index=False)
-        if sets_df is not None and not sets_df.empty:
-            sets_df.to_sql(
-                "swingvision_sets", engine, if_exists="append", index=False
+
+        # One transaction per match: the incremental loader treats a visible
+        # match_id as fully written, so its child rows must land with it.
+        with engine.begin() as conn:
+            match_row.to_sql(
+                "swingvision_matches", conn, if_exists="append", index=False
+            )
+            points_df.to_sql("swingvision_points", conn, if_exists="append", index=False)
+            shots_df.to_sql("swingvision_shots", conn, if_exists="append", index=False)
+            rallies_df.to_sql(
+                "swingvision_rallies", conn, if_exists="append", index=False
             )
+            metrics_df.to_sql(
+                "swingvision_match_metrics", conn, if_exists="append", index=False
+            )
+            if sets_df is not None and not sets_df.empty:
+                sets_df.to_sql(
+                    "swingvision_sets", conn, if_exists="append", index=False
+                )
 
         existing_ids.add(str(match_id))
         st.success(f"Uploaded match: {file.name}")
@@ -439,6 +460,164 @@ def upload_files():
     st.cache_data.clear()
 
 
+def backfill_rallies() -> int:
+    """
+    Compute swingvision_rallies rows for stored matches that have shots but
+    no rally rows yet. Returns the number of matches filled in.
+    """
+    ensure_schema()
+    missing = pd.read_sql(
+        """
+        SELECT DISTINCT s.match_id FROM swingvision_shots s
+        WHERE NOT EXISTS (
+            SELECT 1 FROM swingvision_rallies r WHERE r.match_id = s.match_id
+        )
+        """,
+        engine,
+    )["match_id"].tolist()
+
+    for match_id in missing:
+        params = {"match_id": str(match_id)}
+        shots_df = pd.read_sql(
+            text(
+                "SELECT * FROM swingvision_shots "
+                "WHERE match_id = CAST(:match_id AS uuid)"
+            ),
+            engine,
+            params=params,
+        )
+        rallies_df = build_rally_table(shots_df)
+        with engine.begin() as conn:
+            conn.execute(
+                text(
+                    "DELETE FROM swingvision_rallies "
+                    "WHERE match_id = CAST(:match_id AS uuid)"
+                ),
+                params,
+            )
+            rallies_df.to_sql(
+                "swingvision_rallies", conn, if_exists="append", index=False
+            )
+    return len(missing)
+
+
+def backfill_normalized_coordinates() -> int:
+    """
+    Fill the normalized coordinate columns of shots stored before they
+    existed, with the same rules as court.normalized_coordinates. Shots with
+    no coordinates to normalize are left alone, so running it again updates
+    nothing. Returns the number of shots updated.
+    """
+    ensure_schema()
+    with engine.begin() as conn:
+        result = conn.execute(
+            text(
+                """
+                UPDATE swingvision_shots SET
+                    hit_x_n = CASE WHEN hit_y > :half THEN -hit_x ELSE hit_x END,
+                    hit_y_n = CASE WHEN hit_y > :half
+                        THEN :length - hit_y ELSE hit_y END,
+                    bounce_x_n = CASE WHEN hit_y > :half
+                        THEN -bounce_x ELSE bounce_x END,
+                    bounce_y_n = CASE WHEN result = 'Net' THEN :half
+                        WHEN hit_y > :half THEN :length - bounce_y
+                        ELSE bounce_y END
+                WHERE hit_x_n IS NULL AND hit_y_n IS NULL
+                    AND bounce_x_n IS NULL AND bounce_y_n IS NULL
+                    AND (hit_x IS NOT NULL OR hit_y IS NOT NULL
+                        OR bounce_x IS NOT NULL OR bounce_y IS NOT NULL
+                        OR result = 'Net')
+                """
+            ),
+            {"length": COURT_LENGTH, "half": COURT_LENGTH / 2},
+        )
+        return result.rowcount
+
+
+def _read_match(table_name: str, match_id) -> pd.DataFrame:
+    return pd.read_sql(
+        text(f"SELECT * FROM {table_name} WHERE match_id = CAST(:match_id AS uuid)"),
+        engine,
+        params={"match_id": str(match_id)},
+    )
+
+
+def rebuild_match_metrics(rebuild_all=False) -> int:
+    """
+    Recompute the swingvision_match_metrics row of every stored match that
+    has none, or one from an older MATCH_METRICS_VERSION (of every match with
+    `rebuild_all`). Returns the number of matches rewritten.
+    """
+    ensure_schema()
+    stale = pd.read_sql(
+        text(
+            """
+            SELECT m.match_id FROM swingvision_matches m
+            LEFT JOIN swingvision_match_metrics mm ON mm.match_id = m.match_id
+            WHERE :rebuild_all OR mm.match_id IS NULL
+                OR mm.metrics_version <> :version
+            """
+        ),
+        engine,
+        params={"rebuild_all": rebuild_all, "version": MATCH_METRICS_VERSION},
+    )["match_id"].tolist()
+
+    for match_id in stale:
+        metrics_df = match_metric_rows(
+            _read_match("swingvision_matches", match_id),
+            _read_match("swingvision_points", match_id),
+            _read_match("swingvision_shots", match_id),
+            _read_match("swingvision_sets", match_id),
+            _read_match("swingvision_rallies", match_id),
+        )
+        with engine.begin() as conn:
+            conn.execute(
+                text(
+                    "DELETE FROM swingvision_match_metrics "
+                    "WHERE match_id = CAST(:match_id AS uuid)"
+                ),
+                {"match_id": str(match_id)},
+            )
+            metrics_df.to_sql(
+                "swingvision_match_metrics", conn, if_exists="append", index=False
+            )
+    return len(stale)
+
+
+def _reload_table(table_name: str):
+    """Make the dashboard reread `table_name` after a backfill rewrote it."""
+    forget_table(table_name)
+    # Same match_ids, same dataset version: drop the shared dataset too
+    get_dataset.clear()
+    st.cache_data.clear()
+
+
+def render_maintenance():
+    with st.expander("🛠️ Maintenance"):
+        st.caption(
+            "Rebuild derived tables and columns for matches uploaded before "
+            "they existed. Safe to run again."
+        )
+        if st.button("Backfill rally table"):
+            with st.spinner("Computing rallies..."):
+                filled = backfill_rallies()
+            _reload_table("swingvision_rallies")
+            st.success(f"Rally rows computed for {filled} matches.")
+        if st.button("Backfill normalized coordinates"):
+            with st.spinner("Normalizing shot coordinates..."):
+                updated = backfill_normalized_coordinates()
+            _reload_table("swingvision_shots")
+            st.success(f"Normalized coordinates written for {updated} shots.")
+        rebuild_all = st.checkbox(
+            "Recompute every match, not only missing or outdated metrics"
+        )
+        if st.button("Rebuild match metrics"):
+            with st.spinner("Computing match metrics..."):
+                rebuilt = rebuild_match_metrics(rebuild_all)
+            _reload_table("swingvision_match_metrics")
+            st.success(f"Metrics rewritten for {rebuilt} matches.")
+
+
 def render_upload_files_tab():
     """Render the upload files tab"""
     st.title("📤 Upload SwingVision Files")
@@ -453,3 +632,4 @@ excluded from win/loss.
 """
     )
     upload_files()
+    render_maintenance()